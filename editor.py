@@ -4,6 +4,8 @@
 # Left shift + scroll wheel to change variants of a group
 # Press 'G' to toggle between placing tiles on grid and off grid
 # Press 'T' to autotile if it possible, can be used with the same variant of a grass or stone group currently, instead of having to switch between variants
+# 'T' only autotiles tiles placed or deleted since the last autotile, Left shift + 'T' autotiles the whole map
+# Press 'Y' to toggle autotiling automatically while painting
 # Press 'O' to save as 'map.json', rename or delete before launching editor again to create blank instance
 # Editor attempts to load 'map.json' if present in directory
 import os
@@ -62,6 +64,7 @@ class Editor:
         self.right_clicking = False
         self.shift = False
         self.ongrid = True
+        self.autotiling = False
 
     def run(self):
         while True:
@@ -88,18 +91,17 @@ class Editor:
                 self.display.blit(current_tile_img, mouse_pos)
 
             if self.clicking and self.ongrid:
-                self.tilemap.tilemap[str(tile_pos[0]) + ';' + str(tile_pos[1])] = {
-                    'type': self.tile_list[self.tile_group], 'variant': self.tile_variant, 'pos': tile_pos}
+                tile = self.tilemap.get_tile(tile_pos)
+                ## While autotiling, repainting the same type would undo the autotiled variant every frame
+                if tile is None or tile['type'] != self.tile_list[self.tile_group] or not self.autotiling:
+                    self.tilemap.set_tile(tile_pos, self.tile_list[self.tile_group], self.tile_variant)
             if self.right_clicking:
-                tile_location = str(tile_pos[0]) + ';' + str(tile_pos[1])
-                if tile_location in self.tilemap.tilemap:
-                    del self.tilemap.tilemap[tile_location]
-                for tile in self.tilemap.offgrid_tiles.copy():
-                    tile_img = self.assets[tile['type']][tile['variant']]
-                    tile_r = pygame.Rect(tile['pos'][0] - self.scroll[0], tile['pos'][1] - self.scroll[1],
-                                         tile_img.get_width(), tile_img.get_height())
-                    if tile_r.collidepoint(mouse_pos):
-                        self.tilemap.offgrid_tiles.remove(tile)
+                self.tilemap.remove_tile(tile_pos)
+                for tile in self.tilemap.offgrid_at((mouse_pos[0] + self.scroll[0], mouse_pos[1] + self.scroll[1])):
+                    self.tilemap.remove_offgrid_tile(tile)
+
+            if self.autotiling:
+                self.tilemap.autotile_changed()
 
             self.display.blit(current_tile_img, (5, 5))
 
@@ -111,7 +113,7 @@ class Editor:
                     if event.button == 1:
                         self.clicking = True
                         if not self.ongrid:
-                            self.tilemap.offgrid_tiles.append(
+                            self.tilemap.add_offgrid_tile(
                                 {'type': self.tile_list[self.tile_group], 'variant': self.tile_variant,
                                  'pos': (mouse_pos[0] + self.scroll[0], mouse_pos[1] + self.scroll[1])})
                     if event.button == 3:
@@ -151,7 +153,12 @@ class Editor:
                     if event.key == pygame.K_g:
                         self.ongrid = not self.ongrid
                     if event.key == pygame.K_t:
-                        self.tilemap.autotile()
+                        if self.shift:
+                            self.tilemap.autotile()
+                        else:
+                            self.tilemap.autotile_changed()
+                    if event.key == pygame.K_y:
+                        self.autotiling = not self.autotiling
                     if event.key == pygame.K_o:
                         self.tilemap.save('map.json')
                         # Below is fix for Caden's branch
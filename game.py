@@ -7,19 +7,35 @@ import webbrowser
 
 from scripts.utils import load_image, load_images, Animation
 from scripts.entities import Player, Enemy, Chicken, JumpPowerUp, FireballPowerUp, Ufo, WallOfFlesh, DashPowerUp, HealthRestorePowerUp
+from scripts.entities import LAYER_ENEMY, LAYER_CHICKEN, LAYER_UFO, LAYER_WALL, ENTITY_TYPES, ENEMY_TYPES
 from scripts.tilemap import Tilemap
+from scripts.level_loader import LevelLoader, PRELOAD_DELAY
+from scripts.activity import ActivityRegion, ALWAYS_ACTIVE_VARIANTS
+from scripts.registry import EntityRegistry
 from scripts.clouds import Clouds
-from scripts.particle import Particle
-from scripts.spark import Spark
+from scripts.particle import ParticleSystem
+from scripts.spark import SparkSystem
+from scripts.spatial import SpatialHash
+from scripts.outline import OutlinedLayer
+from scripts.presenter import Presenter
+from scripts.text import TextCache
+from scripts.transition import IrisWipe
+from scripts.projectiles import ProjectileStore, FIREBALL, SWORD, OWNER_ENEMY, HIT_SOUNDS
 
 class Game:
-    def __init__(self):
+    ## Menus are laid out on a 1920x1080 screen and the game on a 960x540 display, the window can be any size
+    ## from 960x540 up (presentation is 'renderer' or 'transform', see Presenter)
+    def __init__(self, window_size=(1920, 1080), presentation='renderer'):
         pygame.init()
 
         pygame.display.set_caption('Soulsworn')
-        self.screen = pygame.display.set_mode((1920, 1080))
+        self.presenter = Presenter((1920, 1080), (960, 540), window_size, presentation)
+        self.screen = self.presenter.screen
         self.display = pygame.Surface((960, 540), pygame.SRCALPHA)
         self.display_2 = pygame.Surface((960, 540))
+        self.sprite_layer = OutlinedLayer(self.display)
+        self.text = TextCache()
+        self.iris_wipe = IrisWipe()
 
         self.clock = pygame.time.Clock()
 
@@ -112,6 +128,15 @@ class Game:
             'empty_heart': load_image('empty_heart.png'),
         }
 
+        ## Mirrored copies of the single-image sprites that are drawn facing either way
+        for name in ['gun', 'sword', 'sword_frame2', 'fireball']:
+            self.assets[name + '_flipped'] = pygame.transform.flip(self.assets[name], True, False)
+
+        ## Full-screen backdrops are drawn first over a black or stale frame: the background has no black pixels and the
+        ## menu is drawn over black anyway, so both blit as plain opaque copies
+        for name in ['background', 'main_menu_bg']:
+            self.assets[name].set_colorkey(None)
+
         self.sfx = {
             'ui_select': pygame.mixer.Sound('data/sfx/ui_select.wav'),
             'open_pause_menu': pygame.mixer.Sound('data/sfx/open_pause_menu.wav'),
@@ -185,24 +210,58 @@ class Game:
         self.master_volume = 0.15
         self.update_music_volume()
 
-        self.clouds = Clouds(self.assets['clouds'], count=24)
+        ## Simulation steps per second are fixed, frames are drawn at render_rate (0 leaves it uncapped)
+        self.sim_rate = 60
+        self.render_rate = 60
+        ## Sprites get their dark rim from cached per-sprite outlines; mask_outlines masks the whole sprite layer every frame instead
+        self.mask_outlines = False
+        self.max_sim_steps = 5
+        self.sim_accumulator = 0
+
+        self.clouds = Clouds(self.assets['clouds'], self.display_2.get_size(), count=24)
         self.tilemap = Tilemap(self, tile_size=16)
+        self.level_loader = LevelLoader(self)
+        self.entities = EntityRegistry(ENTITY_TYPES)
+        self.activity = ActivityRegion(self)
+
+        ## Broadphase for combat hits, rebuilt once per simulation step
+        self.combat_grid = SpatialHash(64)
+
+        ## Enemy projectiles, eggs, fireballs and sword swings, sword swings are never drawn
+        self.projectiles = ProjectileStore([
+            (self.assets['projectile'], self.assets['projectile']),
+            (self.assets['fireball'], self.assets['fireball_flipped']),
+            (self.assets['egg'], self.assets['egg']),
+            None,
+        ])
+
+        self.particles = ParticleSystem(self)
+        self.sparks = SparkSystem()
+        self.music_track = None
+
+        ## Simulation steps run so far, animations are timed from it
+        self.tick = 0
         self.player = Player(self, (50, 50), (16, 16))
         self.screenshake = 0
 
 
+    def next_level(self):
+        return min(self.level + 1, len([name for name in os.listdir('data/maps') if name.endswith('.json')]) - 1)
+
     def load_level(self, map_id):
-        map_path = 'data/maps/' + str(map_id) + '.json'
-        self.tilemap.load(map_path)
+        level = self.level_loader.take(map_id)
+        self.tilemap = level.tilemap
 
         if self.level != 7:
-            pygame.mixer.music.load('data/8-bit_music_brisk.wav')
-            pygame.mixer.music.set_volume(0.08)
-            pygame.mixer.music.play(-1)
+            music_track = 'data/8-bit_music_brisk.wav'
         elif self.level == 7:
-            pygame.mixer.music.load('data/8-bit_music_fast.wav')
-            pygame.mixer.music.set_volume(0.08)
-            pygame.mixer.music.play(-1)
+            music_track = 'data/8-bit_music_fast.wav'
+        ## Only decode the track from disk when it changes, restarting it is enough otherwise
+        if music_track != self.music_track:
+            pygame.mixer.music.load(music_track)
+            self.music_track = music_track
+        pygame.mixer.music.set_volume(0.08)
+        pygame.mixer.music.play(-1)
 
         self.player.reset_powerups()
 
@@ -238,61 +297,65 @@ class Game:
             self.player.give_dash_powerup()
             self.player.fireball_count = 2
 
-        self.leaf_spawners = []
-        for tree in self.tilemap.extract([('large_decor', 2)], keep=True):
-            self.leaf_spawners.append(pygame.Rect(4 + tree['pos'][0], 4 + tree['pos'][1], 23, 13))
+        self.leaf_spawners = level.leaf_spawners
 
-        self.enemies = []
-        self.chickens = []
-        self.ufos = []
-        self.walls_of_flesh = []
+        self.entities.clear()
         self.enemies_remaining = 0
+        self.enemies_remaining_shown = None
+        self.enemies_remaining_text = None
 
-        self.jump_powerups = []
-        self.fireball_powerups = []
-        self.dash_powerups = []
-        self.health_restore_powerups = []
-
-        for spawner in self.tilemap.extract(
-                [('spawners', 0), ('spawners', 1), ('spawners', 2), ('spawners', 3), ('spawners', 4),
-                ('spawners', 5), ('spawners', 6), ('spawners', 7), ('spawners', 8), ('spawners', 9)]):
+        self.activity.reset()
+        for spawner in level.spawners:
             if spawner['variant'] == 0:
-                self.player.pos = spawner['pos']
+                self.player.pos = list(spawner['pos'])
                 self.player.air_time = 0
-            if spawner['variant'] == 1:
-                self.enemies.append(Enemy(self, spawner['pos'], (16, 16)))
-            if spawner['variant'] == 2:
-                self.chickens.append(Chicken(self, spawner['pos'], (16, 16)))
-            if spawner['variant'] == 4:
-                self.fireball_powerups.append(FireballPowerUp(self, spawner['pos'], (16, 16)))
-            if spawner['variant'] == 5:
-                self.jump_powerups.append(JumpPowerUp(self, spawner['pos'], (16, 16)))
-            if spawner['variant'] == 6:
-                self.ufos.append(Ufo(self, spawner['pos'], (16, 16)))
-            if spawner['variant'] == 7:
-                self.walls_of_flesh.append(WallOfFlesh(self, spawner['pos'], (500, 32)))
-            if spawner['variant'] == 8:
-                self.dash_powerups.append(DashPowerUp(self, spawner['pos'], (16, 16)))
-            if spawner['variant'] == 9:
-                self.health_restore_powerups.append(HealthRestorePowerUp(self, spawner['pos'], (16, 16)))
-
-        self.projectiles = []
-        self.fireballs = []
-        self.sword_projectiles = []
-        self.eggs = []
-        self.particles = []
-        self.sparks = []
+            elif spawner['variant'] in ALWAYS_ACTIVE_VARIANTS:
+                self.spawn_entity(spawner)
+            else:
+                ## Everything else waits as a spawner until the camera comes near
+                self.activity.add_spawner(spawner, (16, 16))
+
+        self.projectiles.clear()
+        self.particles.clear()
+        self.sparks.clear()
 
         self.scroll = [0, 0]
+        self.prev_scroll = [0, 0]
+        self.player.prev_pos = list(self.player.pos)
         self.dead = 0
         self.transition = -30
 
+        ## Start parsing the next map in the background once this one has settled
+        self.level_loader.preload(self.next_level(), delay=PRELOAD_DELAY)
+
+    def spawn_entity(self, spawner):
+        if spawner['variant'] == 1:
+            self.entities.add(Enemy(self, spawner['pos'], (16, 16)))
+        if spawner['variant'] == 2:
+            self.entities.add(Chicken(self, spawner['pos'], (16, 16)))
+        if spawner['variant'] == 4:
+            self.entities.add(FireballPowerUp(self, spawner['pos'], (16, 16)))
+        if spawner['variant'] == 5:
+            self.entities.add(JumpPowerUp(self, spawner['pos'], (16, 16)))
+        if spawner['variant'] == 6:
+            self.entities.add(Ufo(self, spawner['pos'], (16, 16)))
+        if spawner['variant'] == 7:
+            self.entities.add(WallOfFlesh(self, spawner['pos'], (500, 32)))
+        if spawner['variant'] == 8:
+            self.entities.add(DashPowerUp(self, spawner['pos'], (16, 16)))
+        if spawner['variant'] == 9:
+            self.entities.add(HealthRestorePowerUp(self, spawner['pos'], (16, 16)))
+
     def start_game(self):
         self.running = True
 
         self.sfx['ambience'].play(-1)
         self.sfx['chicken_ambience'].play(-1)
 
+        ## Time spent in menus before this should not be simulated
+        self.clock.tick()
+        self.sim_accumulator = 0
+
         while self.running:
             for event in pygame.event.get():
                 if event.type == pygame.QUIT:
@@ -323,37 +386,72 @@ class Game:
                     if event.button == 1:
                         self.player.attack()
                 if self.pause_menu_open and event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
-                    self.handle_menu_click(pygame.mouse.get_pos())
+                    self.handle_menu_click(self.presenter.canvas_pos(pygame.mouse.get_pos(), self.display.get_size()))
 
+            frame_time = self.clock.tick(self.render_rate) / 1000
             if not self.pause_menu_open:
-                self.update_game()
+                ## Run as many fixed steps as the elapsed time covers, dropping the rest after a long hitch
+                step = 1 / self.sim_rate
+                self.sim_accumulator += frame_time
+                steps = 0
+                while self.sim_accumulator >= step and steps < self.max_sim_steps:
+                    self.update_game()
+                    self.sim_accumulator -= step
+                    steps += 1
+                if steps == self.max_sim_steps:
+                    self.sim_accumulator = min(self.sim_accumulator, step)
+                self.render_game(self.sim_accumulator / step)
             else:
                 self.render_pause_menu()
 
             self.display_2.blit(self.display, (0, 0))
 
-            screenshake_offset = (random.random() * self.screenshake - self.screenshake / 2,
-                                  random.random() * self.screenshake - self.screenshake / 2)
-            self.screen.blit(pygame.transform.scale(self.display_2, self.screen.get_size()), screenshake_offset)
-            pygame.display.update()
-            self.clock.tick(60)
-
+            ## screenshake is in screen pixels, two to every display pixel
+            screenshake_offset = ((random.random() * self.screenshake - self.screenshake / 2) / 2,
+                                  (random.random() * self.screenshake - self.screenshake / 2) / 2)
+            self.presenter.present(self.display_2, screenshake_offset)
+
+    def snapshot_positions(self):
+        self.prev_scroll = list(self.scroll)
+        self.player.prev_pos = list(self.player.pos)
+        for entity in self.entities:
+            entity.prev_pos = list(entity.pos)
+
+    def build_combat_grid(self):
+        ## Holds handles rather than entities, so hit tests resolve them and skip anything removed since the build
+        self.combat_grid.clear()
+        for enemy in self.entities.of_type('enemy'):
+            self.combat_grid.insert(enemy.handle, enemy.rect(), LAYER_ENEMY)
+        for chicken in self.entities.of_type('chicken'):
+            self.combat_grid.insert(chicken.handle, chicken.rect(), LAYER_CHICKEN)
+        for ufo in self.entities.of_type('ufo'):
+            self.combat_grid.insert(ufo.handle, ufo.rect(), LAYER_UFO)
+        for wall_of_flesh in self.entities.of_type('wall_of_flesh'):
+            self.combat_grid.insert(wall_of_flesh.handle, wall_of_flesh.hitbox, LAYER_WALL)
+
+    ## One fixed simulation step, all drawing happens in render_game
     def update_game(self):
-        self.display.fill((0, 0, 0, 0))
-        self.display_2.blit(self.assets['background'], (0, 0))
+        self.tick += 1
+        self.snapshot_positions()
+
+        ## The level waits behind the shut iris until the chunks on screen have been baked, one per step
+        if self.level_loader.update():
+            return
 
         self.screenshake = max(0, self.screenshake - 1)
 
-        self.enemies_remaining = len(self.enemies) + len(self.chickens) + len(self.ufos) + len(self.walls_of_flesh)
+        self.enemies_remaining = self.entities.count(*ENEMY_TYPES) + self.activity.parked_enemies
 
         if self.enemies_remaining == 0:
             self.transition += 1
             if self.transition == 10 and self.level == 1:
                 self.render_win_screen()
+            else:
+                self.level_loader.advance(self.next_level())
             if self.transition > 30:
                 if self.level != 1:
                     self.sfx['beat_level'].play()
-                self.level = min(self.level + 1, len(os.listdir('data/maps')) - 1)
+                self.level = self.next_level()
                 self.load_level(self.level)
         if self.transition < 0:
             self.transition += 1
@@ -370,35 +468,30 @@ class Game:
 
         self.scroll[0] += (self.player.rect().centerx - self.display.get_width() / 2 - self.scroll[0]) / 30
         self.scroll[1] += (self.player.rect().centery - self.display.get_height() / 2 - self.scroll[1]) / 30
-        render_scroll = (int(self.scroll[0]), int(self.scroll[1]))
 
         for rect in self.leaf_spawners:
             if random.random() * 49999 < rect.width * rect.height:
                 pos = (rect.x + random.random() * rect.width, rect.y + random.random() * rect.height)
-                self.particles.append(Particle(self, 'leaf', pos, velocity=[-0.1, 0.3], frame=random.randint(0, 20)))
+                self.particles.emit('leaf', pos, velocity=[-0.1, 0.3], frame=random.randint(0, 20))
 
         self.clouds.update()
-        self.clouds.render(self.display_2, offset=render_scroll)
 
-        self.tilemap.render(self.display, offset=render_scroll)
+        self.activity.update()
 
-        for enemy in self.enemies.copy():
+        for enemy in self.entities.each('enemy'):
             enemy.update(self.tilemap, (0, 0))
-            enemy.render(self.display, offset=render_scroll)
             if enemy.is_dead():
-                self.enemies.remove(enemy)
+                self.entities.remove(enemy)
 
-        for chicken in self.chickens.copy():
+        for chicken in self.entities.each('chicken'):
             chicken.update(self.tilemap, (0, 0))
-            chicken.render(self.display, offset=render_scroll)
             if chicken.is_dead():
-                self.chickens.remove(chicken)
+                self.entities.remove(chicken)
 
-        for wall_of_flesh in self.walls_of_flesh.copy():
+        for wall_of_flesh in self.entities.each('wall_of_flesh'):
             wall_of_flesh.update(self.tilemap)
-            wall_of_flesh.render(self.display, offset=render_scroll)
             if wall_of_flesh.is_dead():
-                self.walls_of_flesh.remove(wall_of_flesh)
+                self.entities.remove(wall_of_flesh)
 
             if self.player.rect().colliderect(wall_of_flesh.hitbox):
                 if not self.player.is_invulnerable():
@@ -409,11 +502,10 @@ class Game:
                     knockback_force = [math.copysign(2, wall_of_flesh.velocity[0]) * 25, -2]
                     self.player.apply_knockback(knockback_force, duration=10)
 
-        for ufo in self.ufos.copy():
+        for ufo in self.entities.each('ufo'):
             ufo.update(self.player)
-            ufo.render(self.display, offset=render_scroll)
             if ufo.is_dead():
-                self.ufos.remove(ufo)
+                self.entities.remove(ufo)
 
             # Check collision between player and UFO
             if self.player.rect().colliderect(ufo.rect()):
@@ -428,351 +520,293 @@ class Game:
                     ufo.state = 'retreating'
                     ufo.retreat_timer = pygame.time.get_ticks() + ufo.retreat_cooldown
 
-        for fireball_powerup in self.fireball_powerups.copy():
+        for fireball_powerup in self.entities.each('fireball_powerup'):
             fireball_powerup.update(self.tilemap, (0, 0))
-            fireball_powerup.render(self.display, offset=render_scroll)
             if self.player.rect().colliderect(fireball_powerup.rect()):
                 self.sfx['get_powerup'].play()
                 self.player.give_fireball_powerup()
-                self.fireball_powerups.remove(fireball_powerup)
+                self.entities.remove(fireball_powerup)
                 if self.player.fireball_count == 1:
                     self.fireball_tooltip_timer = self.fireball_tooltip_duration
 
-        for jump_powerup in self.jump_powerups.copy():
+        for jump_powerup in self.entities.each('jump_powerup'):
             jump_powerup.update(self.tilemap, (0, 0))
-            jump_powerup.render(self.display, offset=render_scroll)
             if self.player.rect().colliderect(jump_powerup.rect()):
                 self.sfx['get_powerup'].play()
                 self.player.give_jump_powerup()
-                self.jump_powerups.remove(jump_powerup)
+                self.entities.remove(jump_powerup)
                 if self.player.total_jumps == 1:
                     self.jump_tooltip_timer = self.jump_tooltip_duration
 
-        ## Tooltips rendered 
-        if self.jump_tooltip_timer > 0:
-            self.render_jump_tooltip()
-            self.jump_tooltip_timer -= 1
+        self.jump_tooltip_timer = max(0, self.jump_tooltip_timer - 1)
+        self.attack_tooltip_timer = max(0, self.attack_tooltip_timer - 1)
+        self.fireball_tooltip_timer = max(0, self.fireball_tooltip_timer - 1)
+        self.dash_tooltip_timer = max(0, self.dash_tooltip_timer - 1)
 
-        if self.attack_tooltip_timer > 0:
-            self.render_attack_tooltip()
-            self.attack_tooltip_timer -= 1
-
-        if self.fireball_tooltip_timer > 0:
-            self.render_fireball_tooltip()
-            self.fireball_tooltip_timer -= 1
-
-        if self.dash_tooltip_timer > 0:
-            self.render_dash_tooltip()
-            self.dash_tooltip_timer -= 1
-
-        for dash_powerup in self.dash_powerups.copy():
+        for dash_powerup in self.entities.each('dash_powerup'):
             dash_powerup.update(self.tilemap, (0, 0))
-            dash_powerup.render(self.display, offset=render_scroll)
             if self.player.rect().colliderect(dash_powerup.rect()):
                 self.sfx['get_powerup'].play()
                 self.player.give_dash_powerup()
-                self.dash_powerups.remove(dash_powerup)
+                self.entities.remove(dash_powerup)
                 if self.player.dash_count == 1:
                     self.dash_tooltip_timer = self.dash_tooltip_duration
         
-        for health_restore_powerup in self.health_restore_powerups.copy():
+        for health_restore_powerup in self.entities.each('health_restore_powerup'):
             health_restore_powerup.update(self.tilemap, (0, 0))
-            health_restore_powerup.render(self.display, offset=render_scroll)
             if self.player.rect().colliderect(health_restore_powerup.rect()):
                 self.sfx['get_powerup'].play()
                 self.player.give_health_powerup()
-                self.health_restore_powerups.remove(health_restore_powerup)
+                self.entities.remove(health_restore_powerup)
 
         if not self.player.health == 0:
+            self.build_combat_grid()
             self.player.update(self.tilemap, (self.movement[1] - self.movement[0], 0))
-            self.player.render(self.display, offset=render_scroll)
-
-            ## [[(x, y)], direction, timer]
-            ## basic enemy projectiles
-            for projectile in self.projectiles.copy():
-                projectile[0][0] += projectile[1]
-                projectile[2] += 1
-                img = self.assets['projectile']
-                self.display.blit(img, (projectile[0][0] - img.get_width() / 2 - render_scroll[0],
-                                        projectile[0][1] - img.get_height() / 2 - render_scroll[1]))
-                if self.tilemap.solid_check(projectile[0]):
-                    self.sfx['projectile_hit'].play()
-                    self.projectiles.remove(projectile)
-                    for i in range(4):
-                        self.sparks.append(
-                            Spark(projectile[0], random.random() - 0.5 + (math.pi if projectile[1] > 0 else 0),
-                                  2 + random.random()))
-                elif projectile[2] > 720:
-                    self.projectiles.remove(projectile)
-                else:
-                    if self.player.rect().collidepoint(projectile[0]):
-                        if not self.player.is_invulnerable():
-                            self.projectiles.remove(projectile)
-                            self.player.take_damage(1)
-                            self.sfx['projectile_hit'].play()
-                            self.sfx['player_hurt'].play()
-                            self.screenshake = max(16, self.screenshake)
-                            for i in range(30):
-                                angle = random.random() * math.pi * 2
-                                speed = random.random() * 5
-                                self.sparks.append(Spark(self.player.rect().center, angle, 2 + random.random()))
-                                self.particles.append(Particle(self, 'particle', self.player.rect().center,
-                                                               velocity=[math.cos(angle + math.pi) * speed * 0.5,
-                                                                         math.sin(angle + math.pi) * speed * 0.5],
-                                                               frame=random.randint(0, 7)))
+
+            ## Every projectile moves, ages and is tested against the tiles in one batch
+            for kind, pos, direction in self.projectiles.advance(self.tilemap):
+                self.sfx[HIT_SOUNDS[kind]].play()
+                for i in range(4):
+                    self.sparks.emit(pos, random.random() - 0.5 + (math.pi if direction > 0 else 0), 2 + random.random())
+
+            ## Rows hit this step, removed together once every test has run
+            spent = []
+
+            ## Enemy projectiles and chicken eggs
+            for row in self.projectiles.inside(self.player.rect(), OWNER_ENEMY):
+                if not self.player.is_invulnerable():
+                    spent.append(row)
+                    self.player.take_damage(1)
+                    self.sfx[HIT_SOUNDS[self.projectiles.kind[row]]].play()
+                    self.sfx['player_hurt'].play()
+                    self.screenshake = max(16, self.screenshake)
+                    for i in range(30):
+                        angle = random.random() * math.pi * 2
+                        speed = random.random() * 5
+                        self.sparks.emit(self.player.rect().center, angle, 2 + random.random())
+                        self.particles.emit('particle', self.player.rect().center,
+                                            velocity=[math.cos(angle + math.pi) * speed * 0.5,
+                                                      math.sin(angle + math.pi) * speed * 0.5],
+                                            frame=random.randint(0, 7))
 
             ## Fireball projectiles for player
-            for fireball in self.fireballs.copy():
-                fireball[0][0] += fireball[1] * 2.5
-                fireball[2] += 1
-                img = self.assets['fireball']
-                if fireball[1] > 0:
-                    img = pygame.transform.flip(img, True, False)
-                self.display.blit(img, (fireball[0][0] - img.get_width() / 2 - render_scroll[0],
-                                        fireball[0][1] - img.get_height() / 2 - render_scroll[1]))
-                if self.tilemap.solid_check(fireball[0]):
-                    self.sfx['fireball_hit'].play()
-                    self.fireballs.remove(fireball)
-                    for i in range(4):
-                        self.sparks.append(
-                            Spark(fireball[0], random.random() - 0.5 + (math.pi if fireball[1] > 0 else 0),
-                                  2 + random.random()))
-                elif fireball[2] > 360:
-                    self.fireballs.remove(fireball)
-                else:
-                    for enemy in self.enemies:
-                        if enemy.rect().collidepoint(fireball[0]):
-                            if fireball in self.fireballs:  # Check if fireball is still in the list before trying to remove it
-                                self.sfx['fireball_hit'].play()
-                                self.fireballs.remove(fireball)
-                            enemy.take_damage(enemy.max_health / 2)
-                            enemy.is_hit = True
-                            if not enemy.is_dead():
-                                self.sfx['enemy_hurt'].play()
-                                for i in range(4):
-                                    self.sparks.append(
-                                        Spark(fireball[0], random.random() - 0.5 + (math.pi if fireball[1] > 0 else 0),
-                                        2 + random.random()))
-                            else:
-                                self.sfx['enemy_dead'].play()
-                                self.screenshake = max(16, self.screenshake)
-                                for i in range(30):
-                                    angle = random.random() * math.pi * 2
-                                    speed = random.random() * 5
-                                    self.sparks.append(Spark(enemy.rect().center, angle, 2 + random.random()))
-                                    self.particles.append(Particle(self, 'particle', enemy.rect().center,
-                                                                velocity=[math.cos(angle + math.pi) * speed * 0.5,
-                                                                            math.sin(angle + math.pi) * speed * 0.5],
-                                                                frame=random.randint(0, 7)))
-                    for chicken in self.chickens:
-                        if chicken.rect().collidepoint(fireball[0]):
-                            if fireball in self.fireballs:  # Check if fireball is still in the list before trying to remove it
-                                self.sfx['chicken_hurt'].play()
-                                self.sfx['fireball_hit'].play()
-                                self.fireballs.remove(fireball)
-                            chicken.take_damage(chicken.max_health)
-                            self.screenshake = max(16, self.screenshake)
-                            for i in range(30):
-                                angle = random.random() * math.pi * 2
-                                speed = random.random() * 5
-                                self.sparks.append(Spark(chicken.rect().center, angle, 2 + random.random()))
-                                self.particles.append(Particle(self, 'particle', chicken.rect().center,
-                                                               velocity=[math.cos(angle + math.pi) * speed * 0.5,
-                                                                         math.sin(angle + math.pi) * speed * 0.5],
-                                                               frame=random.randint(0, 7)))
-                    for ufo in self.ufos:
-                        if ufo.rect().collidepoint(fireball[0]):
-                            if fireball in self.fireballs:  # Check if fireball is still in the list before trying to remove it
-                                self.sfx['fireball_hit'].play()
-                                self.sfx['ufo_hurt'].play()
-                                self.fireballs.remove(fireball)
-                            ufo.take_damage(ufo.max_health)
-                            self.screenshake = max(16, self.screenshake)
-                            for i in range(30):
-                                angle = random.random() * math.pi * 2
-                                speed = random.random() * 5
-                                self.sparks.append(Spark(ufo.rect().center, angle, 2 + random.random()))
-                                self.particles.append(Particle(self, 'particle', ufo.rect().center,
-                                                               velocity=[math.cos(angle + math.pi) * speed * 0.5,
-                                                                         math.sin(angle + math.pi) * speed * 0.5],
-                                                               frame=random.randint(0, 7)))
-                    for wall_of_flesh in self.walls_of_flesh:
-                        if wall_of_flesh.hitbox.collidepoint(fireball[0]):
-                            if fireball in self.fireballs:  # Check if sword_projectile is still in the list before trying to remove it
-                                self.sfx['fireball_hit'].play()
-                                self.fireballs.remove(fireball)
-                            wall_of_flesh.take_damage(wall_of_flesh.max_health / 10)
-                            wall_of_flesh.is_hit = True
-                            if not wall_of_flesh.is_dead():
-                                self.sfx['wall_hurt'].play()
-                                for i in range(4):
-                                    self.sparks.append(
-                                        Spark(fireball[0], random.random() - 0.5 + (math.pi if fireball[1] > 0 else 0),
-                                        2 + random.random()))
-                            else:
-                                self.sfx['wall_dead'].play()
-                                self.screenshake = max(16, self.screenshake)
-                                for i in range(30):
-                                    angle = random.random() * math.pi * 2
-                                    speed = random.random() * 5
-                                    self.sparks.append(Spark(wall_of_flesh.hitbox.center, angle, 2 + random.random()))
-                                    self.particles.append(Particle(self, 'particle', wall_of_flesh.hitbox.center,
-                                                                velocity=[math.cos(angle + math.pi) * speed * 0.5,
-                                                                         math.sin(angle + math.pi) * speed * 0.5],
-                                                                frame=random.randint(0, 7)))
-            for sword_projectile in self.sword_projectiles.copy():
-                sword_projectile[0][0] += sword_projectile[1] * 8
-                sword_projectile[2] += 1
-                if self.tilemap.solid_check(sword_projectile[0]):
-                    self.sfx['sword_hit_tile'].play()
-                    self.sword_projectiles.remove(sword_projectile)
-                    for i in range(4):
-                        self.sparks.append(
-                            Spark(sword_projectile[0], random.random() - 0.5 + (math.pi if sword_projectile[1] > 0 else 0),
-                                  2 + random.random()))
-                elif sword_projectile[2] > 3:
-                    self.sword_projectiles.remove(sword_projectile)
-                else:
-                    for enemy in self.enemies:
-                        if enemy.rect().collidepoint(sword_projectile[0]):
-                            if sword_projectile in self.sword_projectiles:  # Check if sword_projectile is still in the list before trying to remove it
-                                self.sfx['sword_hit_flesh'].play()
-                                self.sfx['enemy_hurt'].play()
-                                self.sword_projectiles.remove(sword_projectile)
-                            enemy.take_damage(enemy.max_health / 2)
-                            enemy.is_hit = True
-                            if not enemy.is_dead():
-                                for i in range(4):
-                                    self.sparks.append(
-                                        Spark(sword_projectile[0], random.random() - 0.5 + (math.pi if sword_projectile[1] > 0 else 0),
-                                        2 + random.random()))
-                            else:
-                                self.sfx['enemy_dead'].play()
-                                self.screenshake = max(16, self.screenshake)
-                                for i in range(30):
-                                    angle = random.random() * math.pi * 2
-                                    speed = random.random() * 5
-                                    self.sparks.append(Spark(enemy.rect().center, angle, 2 + random.random()))
-                                    self.particles.append(Particle(self, 'particle', enemy.rect().center,
-                                                               velocity=[math.cos(angle + math.pi) * speed * 0.5,
-                                                                         math.sin(angle + math.pi) * speed * 0.5],
-                                                               frame=random.randint(0, 7)))
-                    for chicken in self.chickens:
-                        if chicken.rect().collidepoint(sword_projectile[0]):
-                            if sword_projectile in self.sword_projectiles:  # Check if sword_projectile is still in the list before trying to remove it
-                                self.sfx['chicken_hurt'].play()
-                                self.sfx['sword_hit_flesh'].play()
-                                self.sword_projectiles.remove(sword_projectile)
-                            chicken.take_damage(chicken.max_health)
-                            self.screenshake = max(16, self.screenshake)
-                            for i in range(30):
-                                angle = random.random() * math.pi * 2
-                                speed = random.random() * 5
-                                self.sparks.append(Spark(chicken.rect().center, angle, 2 + random.random()))
-                                self.particles.append(Particle(self, 'particle', chicken.rect().center,
-                                                               velocity=[math.cos(angle + math.pi) * speed * 0.5,
-                                                                         math.sin(angle + math.pi) * speed * 0.5],
-                                                               frame=random.randint(0, 7)))
-                    for ufo in self.ufos:
-                        if ufo.rect().collidepoint(sword_projectile[0]):
-                            if sword_projectile in self.sword_projectiles:  # Check if sword_projectile is still in the list before trying to remove it
-                                self.sfx['sword_hit_metal'].play()
-                                self.sfx['ufo_hurt'].play()
-                                self.sword_projectiles.remove(sword_projectile)
-                            ufo.take_damage(ufo.max_health)
-                            self.screenshake = max(16, self.screenshake)
-                            for i in range(30):
-                                angle = random.random() * math.pi * 2
-                                speed = random.random() * 5
-                                self.sparks.append(Spark(ufo.rect().center, angle, 2 + random.random()))
-                                self.particles.append(Particle(self, 'particle', ufo.rect().center,
-                                                               velocity=[math.cos(angle + math.pi) * speed * 0.5,
-                                                                         math.sin(angle + math.pi) * speed * 0.5],
-                                                               frame=random.randint(0, 7)))
-                    for wall_of_flesh in self.walls_of_flesh:
-                        if wall_of_flesh.hitbox.collidepoint(sword_projectile[0]):
-                            if sword_projectile in self.sword_projectiles:  # Check if sword_projectile is still in the list before trying to remove it
-                                self.sfx['sword_hit_flesh'].play()
-                                self.sword_projectiles.remove(sword_projectile)
-                            wall_of_flesh.take_damage(wall_of_flesh.max_health / 10)
-                            wall_of_flesh.is_hit = True
-                            if not wall_of_flesh.is_dead():
-                                self.sfx['wall_hurt'].play()
-                                for i in range(4):
-                                    self.sparks.append(
-                                        Spark(sword_projectile[0], random.random() - 0.5 + (math.pi if sword_projectile[1] > 0 else 0),
-                                        2 + random.random()))
-                            else:
-                                self.sfx['wall_dead'].play()
-                                self.screenshake = max(16, self.screenshake)
-                                for i in range(30):
-                                    angle = random.random() * math.pi * 2
-                                    speed = random.random() * 5
-                                    self.sparks.append(Spark(wall_of_flesh.hitbox.center, angle, 2 + random.random()))
-                                    self.particles.append(Particle(self, 'particle', wall_of_flesh.hitbox.center,
-                                                                velocity=[math.cos(angle + math.pi) * speed * 0.5,
-                                                                         math.sin(angle + math.pi) * speed * 0.5],
-                                                                frame=random.randint(0, 7)))
-                                
-            ## [[(x, y)], direction, timer]
-            ## chicken egg projectiles
-            for egg in self.eggs.copy():
-                egg[0][0] += egg[1]
-                egg[2] += 1
-                img = self.assets['egg']
-                self.display.blit(img, (egg[0][0] - img.get_width() / 2 - render_scroll[0],
-                                        egg[0][1] - img.get_height() / 2 - render_scroll[1]))
-                if self.tilemap.solid_check(egg[0]):
-                    self.sfx['egg_hit'].play()
-                    self.eggs.remove(egg)
-                    for i in range(4):
-                        self.sparks.append(
-                            Spark(egg[0], random.random() - 0.5 + (math.pi if egg[1] > 0 else 0), 2 + random.random()))
-                elif egg[2] > 720:
-                    self.eggs.remove(egg)
-                else:
-                    if self.player.rect().collidepoint(egg[0]):
-                        if not self.player.is_invulnerable():
-                            self.sfx['egg_hit'].play()
-                            self.sfx['player_hurt'].play()
-                            self.eggs.remove(egg)
-                            self.player.take_damage(1)
-                            self.screenshake = max(16, self.screenshake)
-                            for i in range(30):
-                                angle = random.random() * math.pi * 2
-                                speed = random.random() * 5
-                                self.sparks.append(Spark(self.player.rect().center, angle, 2 + random.random()))
-                                self.particles.append(Particle(self, 'particle', self.player.rect().center,
-                                                               velocity=[math.cos(angle + math.pi) * speed * 0.5,
-                                                                         math.sin(angle + math.pi) * speed * 0.5],
-                                                               frame=random.randint(0, 7)))
-
-        for spark in self.sparks.copy():
-            kill = spark.update()
-            spark.render(self.display, offset=render_scroll)
-            if kill:
-                self.sparks.remove(spark)
-
-        display_mask = pygame.mask.from_surface(self.display)
-        display_sillhouette = display_mask.to_surface(setcolor=(0, 0, 0, 180), unsetcolor=(0, 0, 0, 0))
-        for offset in [(-1, 0), (1, 0), (0, -1), (0, 1)]:
-            self.display_2.blit(display_sillhouette, offset)
-
-        for particle in self.particles.copy():
-            kill = particle.update()
-            particle.render(self.display, offset=render_scroll)
-            if particle.type == 'leaf':
-                particle.pos[0] += math.sin(particle.animation.frame * 0.035) * 0.3
-            if kill:
-                self.particles.remove(particle)
+            for row in self.projectiles.of_kind(FIREBALL):
+                pos = self.projectiles.pos[row].tolist()
+                direction = self.projectiles.vel[row, 0]
+                for enemy in self.entities.resolve(self.combat_grid.query_point(pos, LAYER_ENEMY)):
+                    if row not in spent:
+                        self.sfx['fireball_hit'].play()
+                        spent.append(row)
+                    enemy.take_damage(enemy.max_health / 2)
+                    enemy.is_hit = True
+                    if not enemy.is_dead():
+                        self.sfx['enemy_hurt'].play()
+                        for i in range(4):
+                            self.sparks.emit(pos, random.random() - 0.5 + (math.pi if direction > 0 else 0), 2 + random.random())
+                    else:
+                        self.sfx['enemy_dead'].play()
+                        self.screenshake = max(16, self.screenshake)
+                        for i in range(30):
+                            angle = random.random() * math.pi * 2
+                            speed = random.random() * 5
+                            self.sparks.emit(enemy.rect().center, angle, 2 + random.random())
+                            self.particles.emit('particle', enemy.rect().center,
+                                                velocity=[math.cos(angle + math.pi) * speed * 0.5,
+                                                            math.sin(angle + math.pi) * speed * 0.5],
+                                                frame=random.randint(0, 7))
+                for chicken in self.entities.resolve(self.combat_grid.query_point(pos, LAYER_CHICKEN)):
+                    if row not in spent:
+                        self.sfx['chicken_hurt'].play()
+                        self.sfx['fireball_hit'].play()
+                        spent.append(row)
+                    chicken.take_damage(chicken.max_health)
+                    self.screenshake = max(16, self.screenshake)
+                    for i in range(30):
+                        angle = random.random() * math.pi * 2
+                        speed = random.random() * 5
+                        self.sparks.emit(chicken.rect().center, angle, 2 + random.random())
+                        self.particles.emit('particle', chicken.rect().center,
+                                            velocity=[math.cos(angle + math.pi) * speed * 0.5,
+                                                      math.sin(angle + math.pi) * speed * 0.5],
+                                            frame=random.randint(0, 7))
+                for ufo in self.entities.resolve(self.combat_grid.query_point(pos, LAYER_UFO)):
+                    if row not in spent:
+                        self.sfx['fireball_hit'].play()
+                        self.sfx['ufo_hurt'].play()
+                        spent.append(row)
+                    ufo.take_damage(ufo.max_health)
+                    self.screenshake = max(16, self.screenshake)
+                    for i in range(30):
+                        angle = random.random() * math.pi * 2
+                        speed = random.random() * 5
+                        self.sparks.emit(ufo.rect().center, angle, 2 + random.random())
+                        self.particles.emit('particle', ufo.rect().center,
+                                            velocity=[math.cos(angle + math.pi) * speed * 0.5,
+                                                      math.sin(angle + math.pi) * speed * 0.5],
+                                            frame=random.randint(0, 7))
+                for wall_of_flesh in self.entities.resolve(self.combat_grid.query_point(pos, LAYER_WALL)):
+                    if row not in spent:
+                        self.sfx['fireball_hit'].play()
+                        spent.append(row)
+                    wall_of_flesh.take_damage(wall_of_flesh.max_health / 10)
+                    wall_of_flesh.is_hit = True
+                    if not wall_of_flesh.is_dead():
+                        self.sfx['wall_hurt'].play()
+                        for i in range(4):
+                            self.sparks.emit(pos, random.random() - 0.5 + (math.pi if direction > 0 else 0), 2 + random.random())
+                    else:
+                        self.sfx['wall_dead'].play()
+                        self.screenshake = max(16, self.screenshake)
+                        for i in range(30):
+                            angle = random.random() * math.pi * 2
+                            speed = random.random() * 5
+                            self.sparks.emit(wall_of_flesh.hitbox.center, angle, 2 + random.random())
+                            self.particles.emit('particle', wall_of_flesh.hitbox.center,
+                                                velocity=[math.cos(angle + math.pi) * speed * 0.5,
+                                                         math.sin(angle + math.pi) * speed * 0.5],
+                                                frame=random.randint(0, 7))
+
+            ## Sword swings for player
+            for row in self.projectiles.of_kind(SWORD):
+                pos = self.projectiles.pos[row].tolist()
+                direction = self.projectiles.vel[row, 0]
+                for enemy in self.entities.resolve(self.combat_grid.query_point(pos, LAYER_ENEMY)):
+                    if row not in spent:
+                        self.sfx['sword_hit_flesh'].play()
+                        self.sfx['enemy_hurt'].play()
+                        spent.append(row)
+                    enemy.take_damage(enemy.max_health / 2)
+                    enemy.is_hit = True
+                    if not enemy.is_dead():
+                        for i in range(4):
+                            self.sparks.emit(pos, random.random() - 0.5 + (math.pi if direction > 0 else 0), 2 + random.random())
+                    else:
+                        self.sfx['enemy_dead'].play()
+                        self.screenshake = max(16, self.screenshake)
+                        for i in range(30):
+                            angle = random.random() * math.pi * 2
+                            speed = random.random() * 5
+                            self.sparks.emit(enemy.rect().center, angle, 2 + random.random())
+                            self.particles.emit('particle', enemy.rect().center,
+                                                velocity=[math.cos(angle + math.pi) * speed * 0.5,
+                                                          math.sin(angle + math.pi) * speed * 0.5],
+                                                frame=random.randint(0, 7))
+                for chicken in self.entities.resolve(self.combat_grid.query_point(pos, LAYER_CHICKEN)):
+                    if row not in spent:
+                        self.sfx['chicken_hurt'].play()
+                        self.sfx['sword_hit_flesh'].play()
+                        spent.append(row)
+                    chicken.take_damage(chicken.max_health)
+                    self.screenshake = max(16, self.screenshake)
+                    for i in range(30):
+                        angle = random.random() * math.pi * 2
+                        speed = random.random() * 5
+                        self.sparks.emit(chicken.rect().center, angle, 2 + random.random())
+                        self.particles.emit('particle', chicken.rect().center,
+                                            velocity=[math.cos(angle + math.pi) * speed * 0.5,
+                                                      math.sin(angle + math.pi) * speed * 0.5],
+                                            frame=random.randint(0, 7))
+                for ufo in self.entities.resolve(self.combat_grid.query_point(pos, LAYER_UFO)):
+                    if row not in spent:
+                        self.sfx['sword_hit_metal'].play()
+                        self.sfx['ufo_hurt'].play()
+                        spent.append(row)
+                    ufo.take_damage(ufo.max_health)
+                    self.screenshake = max(16, self.screenshake)
+                    for i in range(30):
+                        angle = random.random() * math.pi * 2
+                        speed = random.random() * 5
+                        self.sparks.emit(ufo.rect().center, angle, 2 + random.random())
+                        self.particles.emit('particle', ufo.rect().center,
+                                            velocity=[math.cos(angle + math.pi) * speed * 0.5,
+                                                      math.sin(angle + math.pi) * speed * 0.5],
+                                            frame=random.randint(0, 7))
+                for wall_of_flesh in self.entities.resolve(self.combat_grid.query_point(pos, LAYER_WALL)):
+                    if row not in spent:
+                        self.sfx['sword_hit_flesh'].play()
+                        spent.append(row)
+                    wall_of_flesh.take_damage(wall_of_flesh.max_health / 10)
+                    wall_of_flesh.is_hit = True
+                    if not wall_of_flesh.is_dead():
+                        self.sfx['wall_hurt'].play()
+                        for i in range(4):
+                            self.sparks.emit(pos, random.random() - 0.5 + (math.pi if direction > 0 else 0), 2 + random.random())
+                    else:
+                        self.sfx['wall_dead'].play()
+                        self.screenshake = max(16, self.screenshake)
+                        for i in range(30):
+                            angle = random.random() * math.pi * 2
+                            speed = random.random() * 5
+                            self.sparks.emit(wall_of_flesh.hitbox.center, angle, 2 + random.random())
+                            self.particles.emit('particle', wall_of_flesh.hitbox.center,
+                                                velocity=[math.cos(angle + math.pi) * speed * 0.5,
+                                                         math.sin(angle + math.pi) * speed * 0.5],
+                                                frame=random.randint(0, 7))
+
+            self.projectiles.remove(spent)
+
+        self.sparks.update()
+
+        self.particles.update()
+
+    ## Draws the latest simulated state, alpha is how far into the next step the frame falls
+    def render_game(self, alpha=1):
+        self.display.fill((0, 0, 0, 0))
+        self.display_2.blit(self.assets['background'], (0, 0))
+
+        render_scroll = (int(self.prev_scroll[0] + (self.scroll[0] - self.prev_scroll[0]) * alpha),
+                         int(self.prev_scroll[1] + (self.scroll[1] - self.prev_scroll[1]) * alpha))
+
+        self.clouds.render(self.display_2, offset=render_scroll)
+
+        ## Everything drawn through layer gets a dark rim on display_2. Sparks are too thin and short-lived to need one
+        ## and only get it from the mask pass
+        layer = self.display if self.mask_outlines else self.sprite_layer
+        ## Nothing shows through a shut iris, and drawing would bake every chunk on screen in one frame
+        if abs(self.transition) < 30:
+            self.tilemap.render(layer, offset=render_scroll)
+
+        for entity_type in ['enemy', 'chicken', 'wall_of_flesh', 'ufo', 'fireball_powerup', 'jump_powerup']:
+            for entity in self.entities.of_type(entity_type):
+                entity.render(layer, offset=entity.render_offset(render_scroll, alpha))
+
+        ## Tooltips rendered 
+        if self.jump_tooltip_timer > 0:
+            self.render_jump_tooltip(layer)
+
+        if self.attack_tooltip_timer > 0:
+            self.render_attack_tooltip(layer)
+
+        if self.fireball_tooltip_timer > 0:
+            self.render_fireball_tooltip(layer)
+
+        if self.dash_tooltip_timer > 0:
+            self.render_dash_tooltip(layer)
+
+        for entity_type in ['dash_powerup', 'health_restore_powerup']:
+            for entity in self.entities.of_type(entity_type):
+                entity.render(layer, offset=entity.render_offset(render_scroll, alpha))
+
+        if not self.player.health == 0:
+            self.player.render(layer, offset=self.player.render_offset(render_scroll, alpha))
+
+            ## Projectiles are drawn one step's travel back along their direction to match the interpolated entities
+            self.projectiles.render(layer, offset=render_scroll, alpha=alpha)
+
+        self.sparks.render(self.display, offset=render_scroll)
+
+        if self.mask_outlines:
+            display_mask = pygame.mask.from_surface(self.display)
+            display_sillhouette = display_mask.to_surface(setcolor=(0, 0, 0, 180), unsetcolor=(0, 0, 0, 0))
+            for offset in [(-1, 0), (1, 0), (0, -1), (0, 1)]:
+                self.display_2.blit(display_sillhouette, offset)
+        else:
+            self.sprite_layer.draw_outlines(self.display_2)
+
+        self.particles.render(self.display, offset=render_scroll)
 
         if self.transition:
-            transition_surf = pygame.Surface(self.display.get_size())
-            pygame.draw.circle(transition_surf, (255, 255, 255),
-                               (self.display.get_width() // 2, self.display.get_height() // 2),
-                               (30 - abs(self.transition)) * 8)
-            transition_surf.set_colorkey((255, 255, 255))
-            self.display.blit(transition_surf, (0, 0))
+            self.iris_wipe.render(self.display, (30 - abs(self.transition)) * 8)
 
         self.player.draw_health()
         self.render_pause_popup()
@@ -801,14 +835,11 @@ class Game:
         self.update_music_volume()
 
     def render_pause_menu(self):
-
-        font = pygame.font.Font('data/fonts/alagard.ttf', 36)
-
-        resume_text = font.render('Resume', True, pygame.Color('white'))
-        restart_text = font.render('Restart', True, pygame.Color('white'))
-        controls_text = font.render('Controls', True, pygame.Color('white'))
-        feedback_text = font.render('Submit Feedback', True, pygame.Color('white'))
-        quit_text = font.render('Quit To Main Menu', True, pygame.Color('white'))
+        resume_text = self.text.render('Resume', 36)
+        restart_text = self.text.render('Restart', 36)
+        controls_text = self.text.render('Controls', 36)
+        feedback_text = self.text.render('Submit Feedback', 36)
+        quit_text = self.text.render('Quit To Main Menu', 36)
 
         resume_rect = resume_text.get_rect(center=(480, 200))
         restart_rect = restart_text.get_rect(center=(480, 250))
@@ -816,9 +847,7 @@ class Game:
         feedback_rect = feedback_text.get_rect(center=(480, 350))
         quit_rect = quit_text.get_rect(center=(480, 400))
 
-        mx, my = pygame.mouse.get_pos()
-        scale_x, scale_y = self.screen.get_width() / self.display.get_width(), self.screen.get_height() / self.display.get_height()
-        mouse_pos = (mx / scale_x, my / scale_y)
+        mouse_pos = self.presenter.canvas_pos(pygame.mouse.get_pos(), self.display.get_size())
 
         # Highlight if hovered
         if resume_rect.collidepoint(mouse_pos):
@@ -861,18 +890,16 @@ class Game:
     def render_options_menu(self):
         self.screen.fill((0, 0, 0))
 
-        font = pygame.font.Font('data/fonts/alagard.ttf', 36)
-
         # Volume controls
-        volume_text = font.render(f'Music: {int(self.master_volume * 100)}%', True, pygame.Color('white'))
+        volume_text = self.text.render(f'Music: {int(self.master_volume * 100)}%', 36)
         volume_rect = volume_text.get_rect(center=(self.screen.get_width() // 2, self.screen.get_height() // 2 - 100))
-        plus_text = font.render('+', True, pygame.Color('white'))
-        minus_text = font.render('-', True, pygame.Color('white'))
+        plus_text = self.text.render('+', 36)
+        minus_text = self.text.render('-', 36)
         plus_rect = plus_text.get_rect(center=(self.screen.get_width() // 2 + 120, self.screen.get_height() // 2 - 100))
         minus_rect = minus_text.get_rect(
             center=(self.screen.get_width() // 2 - 120, self.screen.get_height() // 2 - 100))
 
-        back_text = font.render('Back', True, pygame.Color('white'))
+        back_text = self.text.render('Back', 36)
         back_rect = back_text.get_rect(center=(self.screen.get_width() // 2, self.screen.get_height() // 2 + 100))
 
         pygame.draw.rect(self.screen, (255, 255, 255), back_rect.inflate(20, 10), 2)
@@ -894,35 +921,32 @@ class Game:
         self.minus_rect = minus_rect.inflate(20, 10)
 
     def handle_menu_click(self, mouse_pos):
-        scale_x, scale_y = self.screen.get_width() / self.display.get_width(), self.screen.get_height() / self.display.get_height()
-        scaled_mouse_pos = (mouse_pos[0] / scale_x, mouse_pos[1] / scale_y)
-
-        if self.resume_rect.collidepoint(scaled_mouse_pos):
+        if self.resume_rect.collidepoint(mouse_pos):
             self.sfx['ui_select'].play()
             self.pause_menu_open = not self.pause_menu_open
-        if self.restart_rect.collidepoint(scaled_mouse_pos):
+        if self.restart_rect.collidepoint(mouse_pos):
             self.sfx['ui_select'].play()
             self.reset_game()
-        if self.controls_rect.collidepoint(scaled_mouse_pos):
+        if self.controls_rect.collidepoint(mouse_pos):
             self.sfx['ui_select'].play()
             self.render_controls_menu()
-        if self.feedback_rect.collidepoint(scaled_mouse_pos):
+        if self.feedback_rect.collidepoint(mouse_pos):
             self.sfx['ui_select'].play()
             feedback_url = 'https://mail.google.com/mail/?view=cm&fs=1&to=cbohannon4@murraystate.edu,ghopkins3@murraystate.edu,ahead5@murraystate.edu'
             webbrowser.open_new(feedback_url)
-        if self.quit_rect.collidepoint(scaled_mouse_pos):
+        if self.quit_rect.collidepoint(mouse_pos):
             self.sfx['ui_select'].play()
             self.running = False
             pygame.mixer.stop()
             self.main_menu()
     
-        if self.plus_rect.collidepoint(scaled_mouse_pos):
+        if self.plus_rect.collidepoint(mouse_pos):
             self.increase_volume()
             self.sfx['ui_select'].play()
-        elif self.minus_rect.collidepoint(scaled_mouse_pos):
+        elif self.minus_rect.collidepoint(mouse_pos):
             self.decrease_volume()
             self.sfx['ui_select'].play()
-        elif self.back_rect.collidepoint(scaled_mouse_pos):
+        elif self.back_rect.collidepoint(mouse_pos):
             self.pause_menu_open = False
             self.sfx['ui_select'].play()
 
@@ -930,33 +954,34 @@ class Game:
         self.display.blit(self.assets['control_menu'], (40, 100))
     
     def render_enemies_remaining(self):
-        font = pygame.font.Font('data/fonts/alagard.ttf', 24)
-        enemies_remaining_text = font.render(f'Enemies Remaining: {int(self.enemies_remaining)}', True, pygame.Color('white'))
-        self.display.blit(enemies_remaining_text, (350, 25))
+        ## The counter is only looked up again when the count changes
+        if self.enemies_remaining_shown != int(self.enemies_remaining):
+            self.enemies_remaining_shown = int(self.enemies_remaining)
+            self.enemies_remaining_text = self.text.render(f'Enemies Remaining: {self.enemies_remaining_shown}', 24)
+        self.display.blit(self.enemies_remaining_text, (350, 25))
 
     def render_pause_popup(self):
         self.display.blit(self.assets['pause_popup'], (750, 15))
 
-    def render_jump_tooltip(self):
-        self.display.blit(self.assets['jump_tooltip'], (480, 180))
+    def render_jump_tooltip(self, surf):
+        surf.blit(self.assets['jump_tooltip'], (480, 180))
 
-    def render_attack_tooltip(self):
-        self.display.blit(self.assets['attack_tooltip'], (480, 180))
+    def render_attack_tooltip(self, surf):
+        surf.blit(self.assets['attack_tooltip'], (480, 180))
     
-    def render_fireball_tooltip(self):
-        self.display.blit(self.assets['fireball_tooltip'], (480, 180))
+    def render_fireball_tooltip(self, surf):
+        surf.blit(self.assets['fireball_tooltip'], (480, 180))
 
-    def render_dash_tooltip(self):
-        self.display.blit(self.assets['dash_tooltip'], (480, 180))
+    def render_dash_tooltip(self, surf):
+        surf.blit(self.assets['dash_tooltip'], (480, 180))
 
     def render_win_screen(self):
         pygame.mixer.stop()
         self.sfx['beat_game'].play()
         self.win_screen_active = True
-        font = pygame.font.Font('data/fonts/alagard.ttf', 72)
-        win_text = font.render('You Win, Congratulations!', True, pygame.Color('white'))
-        restart_text = font.render('Restart', True, pygame.Color('white'))
-        quit_text = font.render('Back to Menu', True, pygame.Color('white'))
+        win_text = self.text.render('You Win, Congratulations!', 72)
+        restart_text = self.text.render('Restart', 72)
+        quit_text = self.text.render('Back to Menu', 72)
 
         center_x = self.screen.get_width() // 2
         center_y = self.screen.get_height() // 2
@@ -970,7 +995,7 @@ class Game:
             self.screen.blit(restart_text, restart_text_rect.topleft)
             self.screen.blit(quit_text, quit_text_rect.topleft)
 
-            pygame.display.flip()
+            self.presenter.present(self.screen)
 
             for event in pygame.event.get():
                 if event.type == pygame.QUIT:
@@ -978,15 +1003,15 @@ class Game:
                     sys.exit()
                 elif event.type == pygame.MOUSEBUTTONDOWN:
                     if event.button == 1:
-                        mouse_x, mouse_y = event.pos
-                        if restart_text_rect.collidepoint(mouse_x, mouse_y):
+                        mouse_pos = self.presenter.canvas_pos(event.pos, self.screen.get_size())
+                        if restart_text_rect.collidepoint(mouse_pos):
                             self.sfx['ui_select'].play()
                             self.reset_game()
                             return
-                        elif quit_text_rect.collidepoint(mouse_x, mouse_y):
+                        elif quit_text_rect.collidepoint(mouse_pos):
                             self.sfx['ui_select'].play()
                             self.main_menu()
-        pygame.display.update()
+        self.presenter.present(self.screen)
 
     def main_menu(self):
         in_options_menu = False  # State to track which menu to display
@@ -995,15 +1020,14 @@ class Game:
         pygame.mixer.music.load('data/Of_Knights_and_Kings.wav')
         pygame.mixer.music.set_volume(0.04)
         pygame.mixer.music.play(-1)
+        self.music_track = 'data/Of_Knights_and_Kings.wav'
         self.running = False
 
-        font = pygame.font.Font(None, 36)
-
-        new_game_text = font.render('', True, pygame.Color('black'))
-        load_game_text = font.render('', True, pygame.Color('black'))
-        feedback_text = font.render('', True, pygame.Color('black'))
-        options_text = font.render('', True, pygame.Color('black'))
-        quit_text = font.render('', True, pygame.Color('black'))
+        new_game_text = self.text.render('', 36, pygame.Color('black'), face=None)
+        load_game_text = self.text.render('', 36, pygame.Color('black'), face=None)
+        feedback_text = self.text.render('', 36, pygame.Color('black'), face=None)
+        options_text = self.text.render('', 36, pygame.Color('black'), face=None)
+        quit_text = self.text.render('', 36, pygame.Color('black'), face=None)
 
         new_game_pos = (705, 430)
         load_game_pos = (705, 512)
@@ -1029,7 +1053,7 @@ class Game:
                     pygame.quit()
                     sys.exit()
                 elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
-                    mouse_pos = pygame.mouse.get_pos()
+                    mouse_pos = self.presenter.canvas_pos(pygame.mouse.get_pos(), self.screen.get_size())
                     print("main menu clicked: ", mouse_pos)
                     if in_options_menu:
                         if self.back_rect.collidepoint(mouse_pos):
@@ -1080,7 +1104,7 @@ class Game:
                 self.clouds.update()
                 self.clouds.render(self.screen)
 
-            pygame.display.flip()
+            self.presenter.present(self.screen)
             self.clock.tick(60)
 
 Game().main_menu()
\ No newline at end of file
@@ -0,0 +1,74 @@
+import pygame
+
+from scripts.spatial import BucketIndex
+
+## Spawner variants made into entities when the level loads: ufos and walls of flesh chase the player from anywhere
+ALWAYS_ACTIVE_VARIANTS = {6, 7}
+## Spawner variants and entity types that can be parked while counting toward the enemies remaining
+ENEMY_VARIANTS = {1, 2}
+SLEEPING_ENEMY_TYPES = {'enemy', 'chicken'}
+SLEEPABLE_TYPES = ['enemy', 'chicken', 'fireball_powerup', 'jump_powerup', 'dash_powerup', 'health_restore_powerup']
+
+## Entities within WAKE_MARGIN of the active region are simulated, ones further than SLEEP_MARGIN are parked.
+## The gap between the two stops entities near the edge from flipping state every step
+WAKE_MARGIN = 256
+SLEEP_MARGIN = 512
+BUCKET_SIZE = 256
+
+
+class ActivityRegion:
+    def __init__(self, game):
+        self.game = game
+
+        ## Spawners not yet turned into entities, and entities taken out of the registry while out of range
+        self.dormant = BucketIndex(BUCKET_SIZE)
+        self.sleeping = BucketIndex(BUCKET_SIZE)
+
+        ## Dormant or sleeping entries that still count as enemies remaining
+        self.parked_enemies = 0
+
+    def reset(self):
+        self.dormant.clear()
+        self.sleeping.clear()
+        self.parked_enemies = 0
+
+    def add_spawner(self, spawner, size):
+        self.dormant.insert(spawner, pygame.Rect(spawner['pos'][0], spawner['pos'][1], size[0], size[1]))
+        if spawner['variant'] in ENEMY_VARIANTS:
+            self.parked_enemies += 1
+
+    def region(self):
+        ## The camera view, stretched to also cover a view around the player while the camera is still catching up
+        game = self.game
+        width, height = game.display.get_size()
+        view = pygame.Rect(int(game.scroll[0]), int(game.scroll[1]), width, height)
+        center = game.player.rect().center
+        return view.union(pygame.Rect(center[0] - width // 2, center[1] - height // 2, width, height))
+
+    def update(self):
+        region = self.region()
+        wake = region.inflate(WAKE_MARGIN * 2, WAKE_MARGIN * 2)
+        awake = region.inflate(SLEEP_MARGIN * 2, SLEEP_MARGIN * 2)
+        registry = self.game.entities
+
+        for spawner in self.dormant.query_rect(wake):
+            self.dormant.remove(spawner)
+            if spawner['variant'] in ENEMY_VARIANTS:
+                self.parked_enemies -= 1
+            self.game.spawn_entity(spawner)
+
+        for entity in self.sleeping.query_rect(wake):
+            self.sleeping.remove(entity)
+            if entity.type in SLEEPING_ENEMY_TYPES:
+                self.parked_enemies -= 1
+            entity.prev_pos = list(entity.pos)
+            registry.add(entity)
+
+        for entity_type in SLEEPABLE_TYPES:
+            for entity in registry.each(entity_type):
+                rect = entity.rect()
+                if not rect.colliderect(awake):
+                    registry.remove(entity)
+                    self.sleeping.insert(entity, rect)
+                    if entity_type in SLEEPING_ENEMY_TYPES:
+                        self.parked_enemies += 1
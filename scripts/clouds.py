@@ -1,33 +1,70 @@
 import random
 
+import pygame
+
 class Cloud:
     def __init__(self, pos, img, speed, depth):
         self.pos = list(pos)
         self.img = img
         self.speed = speed
         self.depth = depth
-    
+
+class CloudBand:
+    ## Clouds at about the same depth, drifting together at their average speed and depth. They are baked into a tile
+    ## for the size of the surface they are drawn on, wrapping seamlessly every period pixels, so the whole band draws
+    ## with at most four blits
+    def __init__(self, clouds, size):
+        self.clouds = clouds
+        self.depth = sum(cloud.depth for cloud in clouds) / len(clouds)
+        self.speed = sum(cloud.speed for cloud in clouds) / len(clouds)
+        self.pos = [0, 0]
+        ## A cloud may sit this far off the top/left of the target before it wraps round
+        self.margin = (max(cloud.img.get_width() for cloud in clouds), max(cloud.img.get_height() for cloud in clouds))
+        self.tile = self.bake(size)
+
+    def bake(self, size):
+        period = (size[0] + self.margin[0], size[1] + self.margin[1])
+        tile = pygame.Surface(period)
+        tile.fill((0, 0, 0))
+        for cloud in self.clouds:
+            x = cloud.pos[0] % period[0]
+            y = cloud.pos[1] % period[1]
+            ## Copies one period back cover clouds hanging over the tile's right or bottom edge
+            for shift in [(0, 0), (-period[0], 0), (0, -period[1]), (-period[0], -period[1])]:
+                tile.blit(cloud.img, (x + shift[0], y + shift[1]))
+        tile.set_colorkey((0, 0, 0), pygame.RLEACCEL)
+        return tile
+
     def update(self):
         self.pos[0] += self.speed
-    
+
     def render(self, surf, offset=(0, 0)):
-        render_pos = (self.pos[0] - offset[0] * self.depth, self.pos[1] - offset[1] * self.depth)
-        surf.blit(self.img, (render_pos[0] % (surf.get_width() + self.img.get_width()) - self.img.get_width(), render_pos[1] % (surf.get_height() + self.img.get_height()) - self.img.get_height()))
+        tile = self.tile
+        period = tile.get_size()
+        x = (self.pos[0] - offset[0] * self.depth) % period[0] - self.margin[0]
+        y = (self.pos[1] - offset[1] * self.depth) % period[1] - self.margin[1]
+        for tile_x in [x - period[0], x]:
+            for tile_y in [y - period[1], y]:
+                if tile_x + period[0] > 0 and tile_y + period[1] > 0:
+                    surf.blit(tile, (tile_x, tile_y))
 
 class Clouds:
-    def __init__(self, cloud_images, count=16):
+    ## size is the surface the clouds are drawn on
+    def __init__(self, cloud_images, size, count=16, bands=3):
         self.clouds = []
-        
+
         for i in range(count):
             self.clouds.append(Cloud((random.random() * 99999, random.random() * 99999), random.choice(cloud_images), random.random() * 0.05 + 0.05, random.random() * 0.6 + 0.2))
 
         self.clouds.sort(key=lambda x : x.depth)
 
+        ## Far bands first, each taking an even share of the clouds sorted by depth
+        self.bands = [CloudBand(self.clouds[i * count // bands:(i + 1) * count // bands], size) for i in range(bands)]
+
     def update(self):
-        for cloud in self.clouds:
-            cloud.update()
+        for band in self.bands:
+            band.update()
 
     def render(self, surf, offset=(0, 0)):
-        for cloud in self.clouds:
-            cloud.render(surf, offset=offset)       
-    
\ No newline at end of file
+        for band in self.bands:
+            band.render(surf, offset=offset)
@@ -2,14 +2,30 @@ import pygame
 import random
 import math
 
-from scripts.particle import Particle
-from scripts.spark import Spark
+from scripts.projectiles import PROJECTILE, FIREBALL, EGG, SWORD
+
+## Collision layers for the combat broadphase, combined as bit masks in queries
+LAYER_ENEMY = 1
+LAYER_CHICKEN = 2
+LAYER_UFO = 4
+LAYER_WALL = 8
+
+## Types kept in the game's entity registry, and the ones a level needs killed to be beaten
+ENTITY_TYPES = ['enemy', 'chicken', 'ufo', 'wall_of_flesh', 'jump_powerup', 'fireball_powerup', 'dash_powerup', 'health_restore_powerup']
+ENEMY_TYPES = ['enemy', 'chicken', 'ufo', 'wall_of_flesh']
 
 class PhysicsEntity:
+    ## Animation frames advanced per simulation step
+    anim_rate = 1
+
     def __init__(self, game, e_type, pos, size):
         self.game = game
         self.type = e_type
         self.pos = list(pos)
+        ## Set while the entity is in the game's registry
+        self.handle = None
+        ## Position at the start of the current simulation step, rendering interpolates from here to pos
+        self.prev_pos = list(pos)
         self.size = size
         self.velocity = [0, 0]
         self.collisions = {'up': False, 'down': False, 'right': False, 'left': False}
@@ -25,40 +41,72 @@ class PhysicsEntity:
         return pygame.Rect(self.pos[0], self.pos[1], self.size[0], self.size[1])
 
     def set_action(self, action):
+        ## The clip is shared, the entity only keeps the tick it started playing on
         if action != self.action:
             self.action = action
-            self.animation = self.game.assets[self.type + '/' + self.action].copy()
+            self.animation = self.game.assets[self.type + '/' + self.action]
+            self.anim_start = self.game.tick
 
-    def update(self, tilemap, movement=(0, 0)):
+    def anim_frame(self):
+        return self.animation.frame_at((self.game.tick - self.anim_start) * self.anim_rate)
+
+    def move(self, tilemap, frame_movement):
         self.collisions = {'up': False, 'down': False, 'right': False, 'left': False}
+        self.sweep(tilemap, 0, frame_movement[0])
+        self.sweep(tilemap, 1, frame_movement[1])
 
+    def sweep(self, tilemap, axis, delta):
+        ## Swept test along one axis: stops at the nearest collision rect anywhere on the path, so fast moves can't tunnel.
+        ## Stops are set to the rect's edge exactly, adding a corrected delta could leave the entity a rounding error inside
+        if not delta:
+            return
+        other = 1 - axis
+        start = self.pos[axis]
+        size = self.size[axis]
+        low = min(start, start + delta)
+        high = max(start, start + delta) + size
+        if axis == 0:
+            area = pygame.Rect(math.floor(low), math.floor(self.pos[1]), math.ceil(high) - math.floor(low), math.ceil(self.pos[1] + self.size[1]) - math.floor(self.pos[1]))
+        else:
+            area = pygame.Rect(math.floor(self.pos[0]), math.floor(low), math.ceil(self.pos[0] + self.size[0]) - math.floor(self.pos[0]), math.ceil(high) - math.floor(low))
+
+        forward = delta > 0
+        end = start + delta
+        hit = False
+        push = None
+        for rect in tilemap.physics_rects_in(area):
+            rect_low, rect_high = (rect.left, rect.right) if axis == 0 else (rect.top, rect.bottom)
+            other_low, other_high = (rect.top, rect.bottom) if axis == 0 else (rect.left, rect.right)
+            if not (self.pos[other] < other_high and self.pos[other] + self.size[other] > other_low):
+                continue
+            if rect_low < start + size and rect_high > start:
+                ## Rects already overlapping the entity push it out by the smallest displacement that clears them. Merged
+                ## rects can be long, so one that is shallower to leave along the other axis is left to that axis' sweep
+                out = rect_low - size if start + size - rect_low <= rect_high - start else rect_high
+                if abs(out - start) > min(self.pos[other] + self.size[other] - other_low, other_high - self.pos[other]):
+                    continue
+                if push is None or abs(out - start) < abs(push - start):
+                    push = out
+            elif forward and rect_low >= start + size and rect_low < end + size:
+                end = rect_low - size
+                hit = True
+            elif not forward and rect_high <= start and rect_high > end:
+                end = rect_high
+                hit = True
+
+        if push is not None:
+            end = push
+            forward = push < start
+            hit = True
+        self.pos[axis] = end
+        if hit:
+            self.collisions[('right' if forward else 'left') if axis == 0 else ('down' if forward else 'up')] = True
+
+    def update(self, tilemap, movement=(0, 0)):
         frame_movement = (movement[0] + self.velocity[0], movement[1] + self.velocity[1])
+        self.move(tilemap, frame_movement)
 
-        self.pos[0] += frame_movement[0]
-        entity_rect = self.rect()
-        for rect in tilemap.physics_rects_around(self.pos):
-            if entity_rect.colliderect(rect):
-                if frame_movement[0] > 0:
-                    entity_rect.right = rect.left
-                    self.collisions['right'] = True
-                if frame_movement[0] < 0:
-                    entity_rect.left = rect.right
-                    self.collisions['left'] = True
-                self.pos[0] = entity_rect.x
-
-        self.pos[1] += frame_movement[1]
-        entity_rect = self.rect()
-        for rect in tilemap.physics_rects_around(self.pos):
-            if entity_rect.colliderect(rect):
-                if frame_movement[1] > 0:
-                    entity_rect.bottom = rect.top
-                    self.collisions['down'] = True
-                if frame_movement[1] < 0:
-                    entity_rect.top = rect.bottom
-                    self.collisions['up'] = True
-                self.pos[1] = entity_rect.y
-
-        ## Image facing right 
+        ## Image facing right
         if movement[0] > 0:
             self.flip = False
         if movement[0] < 0:
@@ -71,11 +119,12 @@ class PhysicsEntity:
         if self.collisions['down'] or self.collisions['up']:
             self.velocity[1] = 0
 
-        self.animation.update()
+    def render_offset(self, offset, alpha):
+        ## Shifts offset so the entity is drawn alpha of the way from prev_pos to pos
+        return (offset[0] + (self.pos[0] - self.prev_pos[0]) * (1 - alpha), offset[1] + (self.pos[1] - self.prev_pos[1]) * (1 - alpha))
 
     def render(self, surf, offset=(0, 0)):
-        ## Used with animation to flip image
-        surf.blit(pygame.transform.flip(self.animation.img(), self.flip, False),
+        surf.blit(self.animation.img(self.anim_frame(), self.flip),
                   (self.pos[0] - offset[0] + self.anim_offset[0], self.pos[1] - offset[1] + self.anim_offset[1]))
 
 
@@ -111,6 +160,12 @@ class Enemy(LivingEntity):
         self.flicker_count = 0
 
     def update(self, tilemap, movement=(0, 0)):
+        ## Advanced here rather than in render so the flash lasts the same number of steps at any frame rate
+        if self.is_hit:
+            self.flicker_count += 1
+            if self.flicker_count >= 10:
+                self.is_hit = False
+                self.flicker_count = 0
 
         if self.walking:
             if tilemap.solid_check((self.rect().centerx + (-7 if self.flip else 7), self.pos[1] + 23)):
@@ -126,16 +181,16 @@ class Enemy(LivingEntity):
                 if (abs(distance[1]) < 32):
                     if (self.flip and distance[0] < 0):
                         self.game.sfx['shoot_projectile'].play()
-                        self.game.projectiles.append([[self.rect().centerx - 7, self.rect().centery], -1.5, 0])
+                        pos = [self.rect().centerx - 7, self.rect().centery]
+                        self.game.projectiles.spawn(PROJECTILE, pos, -1.5)
                         for i in range(4):
-                            self.game.sparks.append(Spark(self.game.projectiles[-1][0], random.random() - 0.5 + math.pi,
-                                                          2 + random.random()))
+                            self.game.sparks.emit(pos, random.random() - 0.5 + math.pi, 2 + random.random())
                     if (not self.flip and distance[0] > 0):
                         self.game.sfx['shoot_projectile'].play()
-                        self.game.projectiles.append([[self.rect().centerx + 7, self.rect().centery], 1.5, 0])
+                        pos = [self.rect().centerx + 7, self.rect().centery]
+                        self.game.projectiles.spawn(PROJECTILE, pos, 1.5)
                         for i in range(4):
-                            self.game.sparks.append(
-                                Spark(self.game.projectiles[-1][0], random.random() - 0.5, 2 + random.random()))
+                            self.game.sparks.emit(pos, random.random() - 0.5, 2 + random.random())
         elif random.random() < 0.01:
             self.walking = random.randint(30, 120)
 
@@ -149,15 +204,11 @@ class Enemy(LivingEntity):
     def render(self, surf, offset=(0, 0)):
         if self.is_hit:
             self.render_damage(surf, offset, (255, 0, 0), (255, 255, 255))
-            self.flicker_count += 1
-            if self.flicker_count >= 10:
-                self.is_hit = False
-                self.flicker_count = 0
         else:
             super().render(surf, offset=offset)
 
         if self.flip:
-            surf.blit(pygame.transform.flip(self.game.assets['gun'], True, False), (
+            surf.blit(self.game.assets['gun_flipped'], (
                 self.rect().centerx - 6 - self.game.assets['gun'].get_width() - offset[0],
                 self.rect().centery - 2 - offset[1]))
         else:
@@ -165,12 +216,8 @@ class Enemy(LivingEntity):
                       (self.rect().centerx + 6 - offset[0], self.rect().centery - 2 - offset[1]))
 
     def render_damage(self, surf, offset, color1, color2):
-        enemy_sprite = self.animation.img().copy()
-        if self.flicker_count % 2 == 0:
-            enemy_sprite.fill(color1, special_flags=pygame.BLEND_RGB_MULT)
-        else:
-            enemy_sprite.fill(color2, special_flags=pygame.BLEND_RGB_MULT)
-        surf.blit(enemy_sprite, (self.pos[0] - offset[0], self.pos[1] - offset[1]))
+        color = color1 if self.flicker_count % 2 == 0 else color2
+        surf.blit(self.animation.tinted_img(self.anim_frame(), color), (self.pos[0] - offset[0], self.pos[1] - offset[1]))
 
 
 class Chicken(LivingEntity):
@@ -195,16 +242,16 @@ class Chicken(LivingEntity):
                 if (abs(distance[1]) < 32):
                     if (self.flip and distance[0] < 0):
                         self.game.sfx['shoot_egg'].play()
-                        self.game.eggs.append([[self.rect().centerx - 7, self.rect().centery], -1.5, 0])
+                        pos = [self.rect().centerx - 7, self.rect().centery]
+                        self.game.projectiles.spawn(EGG, pos, -1.5)
                         for i in range(4):
-                            self.game.sparks.append(
-                                Spark(self.game.eggs[-1][0], random.random() - 0.5 + math.pi, 2 + random.random()))
+                            self.game.sparks.emit(pos, random.random() - 0.5 + math.pi, 2 + random.random())
                     if (not self.flip and distance[0] > 0):
                         self.game.sfx['shoot_egg'].play()
-                        self.game.eggs.append([[self.rect().centerx + 7, self.rect().centery], 1.5, 0])
+                        pos = [self.rect().centerx + 7, self.rect().centery]
+                        self.game.projectiles.spawn(EGG, pos, 1.5)
                         for i in range(4):
-                            self.game.sparks.append(
-                                Spark(self.game.eggs[-1][0], random.random() - 0.5, 2 + random.random()))
+                            self.game.sparks.emit(pos, random.random() - 0.5, 2 + random.random())
         elif random.random() < 0.01:
             self.walking = random.randint(30, 120)
 
@@ -222,11 +269,12 @@ class Chicken(LivingEntity):
             super().render(surf, offset=offset)
 
     def render_damage(self, surf, offset, color):
-        enemy_sprite = self.animation.img().copy()
-        enemy_sprite.fill(color, special_flags=pygame.BLEND_RGB_MULT)
-        surf.blit(enemy_sprite, (self.pos[0] - offset[0], self.pos[1] - offset[1]))
+        surf.blit(self.animation.tinted_img(self.anim_frame(), color), (self.pos[0] - offset[0], self.pos[1] - offset[1]))
 
 class Player(LivingEntity):
+    ## Animations were tuned to advance twice per frame
+    anim_rate = 2
+
     def __init__(self, game, pos, size):
         super().__init__(game, 'player', pos, size, 3)
         self.initial_position = list(pos)
@@ -277,7 +325,12 @@ class Player(LivingEntity):
 
     def update(self, tilemap, movement=(0, 0)):
         movement = (movement[0] * self.player_movement_speed, movement[1])
-        super().update(tilemap, movement=movement)
+        ## The whole frame's displacement is gathered here and resolved by a single swept move at the end
+        frame_movement = [movement[0] + self.velocity[0], self.velocity[1]]
+        if movement[0] > 0:
+            self.flip = False
+        if movement[0] < 0:
+            self.flip = True
 
         if self.is_invulnerable():
             self.invuln_timer -= 1
@@ -309,8 +362,8 @@ class Player(LivingEntity):
             self.set_action('idle')
 
         if self.knockback_frames > 0:
-            self.pos[0] += self.knockback_velocity[0]
-            self.pos[1] += self.knockback_velocity[1]
+            frame_movement[0] += self.knockback_velocity[0]
+            frame_movement[1] += self.knockback_velocity[1]
             # Gradually reduce knockback impact
             self.knockback_velocity[0] *= 0.8
             self.knockback_velocity[1] *= 0.8
@@ -328,12 +381,10 @@ class Player(LivingEntity):
                                      player_rect.width, player_rect.height)
             if self.flip:
                 pvelocity = [0.15 * random.random(), 0]
-                self.game.particles.append(
-                    Particle(self.game, 'swingleft', sword_rect, velocity=pvelocity, frame=random.randint(0, 7)))
+                self.game.particles.emit('swingleft', sword_rect, velocity=pvelocity, frame=random.randint(0, 7))
             else:
                 pvelocity = [-0.15 * random.random(), 0]
-                self.game.particles.append(
-                    Particle(self.game, 'swingright', sword_rect, velocity=pvelocity, frame=random.randint(0, 7)))
+                self.game.particles.emit('swingright', sword_rect, velocity=pvelocity, frame=random.randint(0, 7))
 
         current_time = pygame.time.get_ticks()
         if (current_time - self.last_fireball_time) > self.fireball_cooldown:
@@ -342,9 +393,9 @@ class Player(LivingEntity):
         if self.shooting and self.has_fireball_powerup:
             self.game.sfx['shoot_fireball'].play()
             if self.flip:
-                self.game.fireballs.append([[self.rect().centerx, self.rect().centery], -1.5, 0])
+                self.game.projectiles.spawn(FIREBALL, self.rect().center, -1.5)
             if not self.flip:
-                self.game.fireballs.append([[self.rect().centerx, self.rect().centery], 1.5, 0])
+                self.game.projectiles.spawn(FIREBALL, self.rect().center, 1.5)
             if pygame.time.get_ticks() - self.last_shoot_time > self.shoot_duration:
                 self.reset_fireball()
 
@@ -355,25 +406,39 @@ class Player(LivingEntity):
                 angle = random.random() * math.pi * 2
                 speed = random.random() * 0.5 + 0.5
                 pvelocity = [math.cos(angle) * speed, math.sin(angle) * speed]
-                self.game.particles.append(Particle(self.game, 'particle', self.rect().center, velocity=pvelocity, frame=random.randint(0, 7)))
+                self.game.particles.emit('particle', self.rect().center, velocity=pvelocity, frame=random.randint(0, 7))
 
             self.dash_frame_count -= 1
             if self.dash_frame_count <= 0:
                 self.dash_active = False
                 self.velocity[0] = 0  # Reset the horizontal velocity when dash ends
 
-            # Remaining update logic
-        super().update(tilemap, movement=(self.velocity[0], movement[1]))
+        ## Keeps the speeds of the old two-pass update: the second pass moved by twice the horizontal velocity
+        ## and applied gravity once more before moving
+        self.velocity[1] = min(5, self.velocity[1] + 0.1)
+        frame_movement[0] += self.velocity[0] * 2
+        frame_movement[1] += movement[1] + self.velocity[1]
+        self.move(tilemap, frame_movement)
+
+        if self.velocity[0] > 0:
+            self.flip = False
+        if self.velocity[0] < 0:
+            self.flip = True
+        self.last_movement = (self.velocity[0], movement[1])
+
+        self.velocity[1] = min(5, self.velocity[1] + 0.1)
+        if self.collisions['down'] or self.collisions['up']:
+            self.velocity[1] = 0
 
     def render(self, surf, offset=(0, 0)):
-        
+
         if self.invuln and self.invuln_timer % 10 < 5 and self.health != self.max_health:
             return
         super().render(surf, offset=offset)
 
         if not self.attacking:
             if self.flip:
-                surf.blit(pygame.transform.flip(self.game.assets['sword'], True, False), (
+                surf.blit(self.game.assets['sword_flipped'], (
                     self.rect().centerx + 28 - self.game.assets['sword'].get_width() - offset[0],
                     self.rect().centery + 2 - self.game.assets['sword'].get_height() - offset[1]))
             else:
@@ -382,7 +447,7 @@ class Player(LivingEntity):
                                                       offset[1]))
         elif self.attacking:
             if self.flip:
-                surf.blit(pygame.transform.flip(self.game.assets['sword_frame2'], True, False), (
+                surf.blit(self.game.assets['sword_frame2_flipped'], (
                     self.rect().centerx + 25 - self.game.assets['sword_frame2'].get_width() - offset[0],
                     self.rect().centery + 5 - self.game.assets['sword_frame2'].get_height() - offset[1]))
             else:
@@ -403,7 +468,7 @@ class Player(LivingEntity):
             self.attacking = True
             self.last_attack_time = current_time
             direction = -1.5 if self.flip else 1.5
-            self.game.sword_projectiles.append([[self.rect().centerx, self.rect().centery], direction, 0])
+            self.game.projectiles.spawn(SWORD, self.rect().center, direction)
 
     def reset_attack(self):
         self.attacking = False
@@ -413,7 +478,7 @@ class Player(LivingEntity):
             self.fireball_shots_available -= 1
             self.last_fireball_time = pygame.time.get_ticks()
             direction = -1.5 if self.flip else 1.5
-            self.game.fireballs.append([[self.rect().centerx, self.rect().centery], direction, 0])
+            self.game.projectiles.spawn(FIREBALL, self.rect().center, direction)
             self.game.sfx['shoot_fireball'].play()
 
     def reset_fireball(self):
@@ -465,93 +530,88 @@ class Player(LivingEntity):
     def handle_dash_collision(self):
         bounce_back_speed = -self.velocity[0] * .8
 
-        for enemy in self.game.enemies:
-            if self.rect().colliderect(enemy.rect()):
-                self.game.sfx['dash_hit'].play()
-                self.game.sfx['enemy_hurt'].play()
-                enemy.take_damage(enemy.max_health)
-                for i in range(30):
-                        angle = random.random() * math.pi * 2
-                        speed = random.random() * 5
-                        self.game.sparks.append(Spark(self.rect().center, angle, 2 + random.random()))
-                        self.game.particles.append(Particle(self.game, 'particle', self.rect().center,
-
-                                                        velocity=[math.cos(angle + math.pi) * speed * 0.5,
-                                                                  math.sin(angle + math.pi) * speed * 0.5],
-                                                        frame=random.randint(0, 7)))
-                self.game.sparks.append(Spark(self.rect().center, 0, 5 + random.random()))
-                self.game.sparks.append(Spark(self.rect().center, math.pi, 5 + random.random()))
-                self.game.screenshake = max(16, self.game.screenshake)
-                self.velocity[0] = -self.velocity[0]
-                if enemy.is_dead():
-                    continue  # Skip the bounce back if the enemy is dead
-                self.velocity[0] = -self.velocity[0]
-
-        for chicken in self.game.chickens:
-            if self.rect().colliderect(chicken.rect()):
-                self.game.sfx['dash_hit'].play()
-                self.game.sfx['chicken_hurt'].play()
-                chicken.take_damage(chicken.max_health)
-                for i in range(30):
-                        angle = random.random() * math.pi * 2
-                        speed = random.random() * 5
-                        self.game.sparks.append(Spark(self.rect().center, angle, 2 + random.random()))
-                        self.game.particles.append(Particle(self.game, 'particle', self.rect().center,
-                                                        velocity=[math.cos(angle + math.pi) * speed * 0.5,
-                                                                  math.sin(angle + math.pi) * speed * 0.5],
-                                                        frame=random.randint(0, 7)))
-                self.game.sparks.append(Spark(self.rect().center, 0, 5 + random.random()))
-                self.game.sparks.append(Spark(self.rect().center, math.pi, 5 + random.random()))
-                self.game.screenshake = max(16, self.game.screenshake)
-                self.velocity[0] = -self.velocity[0]
-                if chicken.is_dead():
-                    continue
-                self.velocity[0] = -self.velocity[0]
-
-        for ufo in self.game.ufos:
-            if self.rect().colliderect(ufo.rect()):
-                self.game.sfx['dash_hit'].play()
-                self.game.sfx['ufo_hurt'].play()
-                ufo.take_damage(ufo.max_health)
-                for i in range(30):
-                        angle = random.random() * math.pi * 2
-                        speed = random.random() * 5
-                        self.game.sparks.append(Spark(self.rect().center, angle, 2 + random.random()))
-                        self.game.particles.append(Particle(self.game, 'particle', self.rect().center,
-                                                        velocity=[math.cos(angle + math.pi) * speed * 0.5,
-                                                                  math.sin(angle + math.pi) * speed * 0.5],
-                                                        frame=random.randint(0, 7)))
-                self.game.sparks.append(Spark(self.rect().center, 0, 5 + random.random()))
-                self.game.sparks.append(Spark(self.rect().center, math.pi, 5 + random.random()))
-                self.game.screenshake = max(16, self.game.screenshake)
-                self.velocity[0] = -self.velocity[0]
-                if ufo.is_dead():
-                    continue
-                self.velocity[0] = -self.velocity[0]
-
-        for wall_of_flesh in self.game.walls_of_flesh:
-            if self.rect().colliderect(wall_of_flesh.hitbox):
-                self.game.sfx['dash_hit'].play()
-                self.game.sfx['wall_hurt'].play()
-                wall_of_flesh.take_damage(wall_of_flesh.max_health / 10)
-                self.velocity[0] = -self.velocity[0] * 2
-                for i in range(30):
-                        angle = random.random() * math.pi * 2
-                        speed = random.random() * 5
-                        self.game.sparks.append(Spark(self.rect().center, angle, 2 + random.random()))
-                        self.game.particles.append(Particle(self.game, 'particle', self.rect().center,
-
-                                                        velocity=[math.cos(angle + math.pi) * speed * 0.5,
-                                                                  math.sin(angle + math.pi) * speed * 0.5],
-                                                        frame=random.randint(0, 7)))
-                self.game.sparks.append(Spark(self.rect().center, 0, 5 + random.random()))
-                self.game.sparks.append(Spark(self.rect().center, math.pi, 5 + random.random()))
-                self.game.screenshake = max(16, self.game.screenshake)
-                self.velocity[0] = -self.velocity[0]
-                if wall_of_flesh.is_dead():
-                    self.game.sfx['wall_dead'].play()
-                    continue
-                self.velocity[0] = -self.velocity[0] * 2
+        player_rect = self.rect()
+        for enemy in self.game.entities.resolve(self.game.combat_grid.query_rect(player_rect, LAYER_ENEMY)):
+            self.game.sfx['dash_hit'].play()
+            self.game.sfx['enemy_hurt'].play()
+            enemy.take_damage(enemy.max_health)
+            for i in range(30):
+                    angle = random.random() * math.pi * 2
+                    speed = random.random() * 5
+                    self.game.sparks.emit(self.rect().center, angle, 2 + random.random())
+                    self.game.particles.emit('particle', self.rect().center,
+                                             velocity=[math.cos(angle + math.pi) * speed * 0.5,
+                                                       math.sin(angle + math.pi) * speed * 0.5],
+                                             frame=random.randint(0, 7))
+            self.game.sparks.emit(self.rect().center, 0, 5 + random.random())
+            self.game.sparks.emit(self.rect().center, math.pi, 5 + random.random())
+            self.game.screenshake = max(16, self.game.screenshake)
+            self.velocity[0] = -self.velocity[0]
+            if enemy.is_dead():
+                continue  # Skip the bounce back if the enemy is dead
+            self.velocity[0] = -self.velocity[0]
+
+        for chicken in self.game.entities.resolve(self.game.combat_grid.query_rect(player_rect, LAYER_CHICKEN)):
+            self.game.sfx['dash_hit'].play()
+            self.game.sfx['chicken_hurt'].play()
+            chicken.take_damage(chicken.max_health)
+            for i in range(30):
+                    angle = random.random() * math.pi * 2
+                    speed = random.random() * 5
+                    self.game.sparks.emit(self.rect().center, angle, 2 + random.random())
+                    self.game.particles.emit('particle', self.rect().center,
+                                             velocity=[math.cos(angle + math.pi) * speed * 0.5,
+                                                       math.sin(angle + math.pi) * speed * 0.5],
+                                             frame=random.randint(0, 7))
+            self.game.sparks.emit(self.rect().center, 0, 5 + random.random())
+            self.game.sparks.emit(self.rect().center, math.pi, 5 + random.random())
+            self.game.screenshake = max(16, self.game.screenshake)
+            self.velocity[0] = -self.velocity[0]
+            if chicken.is_dead():
+                continue
+            self.velocity[0] = -self.velocity[0]
+
+        for ufo in self.game.entities.resolve(self.game.combat_grid.query_rect(player_rect, LAYER_UFO)):
+            self.game.sfx['dash_hit'].play()
+            self.game.sfx['ufo_hurt'].play()
+            ufo.take_damage(ufo.max_health)
+            for i in range(30):
+                    angle = random.random() * math.pi * 2
+                    speed = random.random() * 5
+                    self.game.sparks.emit(self.rect().center, angle, 2 + random.random())
+                    self.game.particles.emit('particle', self.rect().center,
+                                             velocity=[math.cos(angle + math.pi) * speed * 0.5,
+                                                       math.sin(angle + math.pi) * speed * 0.5],
+                                             frame=random.randint(0, 7))
+            self.game.sparks.emit(self.rect().center, 0, 5 + random.random())
+            self.game.sparks.emit(self.rect().center, math.pi, 5 + random.random())
+            self.game.screenshake = max(16, self.game.screenshake)
+            self.velocity[0] = -self.velocity[0]
+            if ufo.is_dead():
+                continue
+            self.velocity[0] = -self.velocity[0]
+
+        for wall_of_flesh in self.game.entities.resolve(self.game.combat_grid.query_rect(player_rect, LAYER_WALL)):
+            self.game.sfx['dash_hit'].play()
+            self.game.sfx['wall_hurt'].play()
+            wall_of_flesh.take_damage(wall_of_flesh.max_health / 10)
+            self.velocity[0] = -self.velocity[0] * 2
+            for i in range(30):
+                    angle = random.random() * math.pi * 2
+                    speed = random.random() * 5
+                    self.game.sparks.emit(self.rect().center, angle, 2 + random.random())
+                    self.game.particles.emit('particle', self.rect().center,
+                                             velocity=[math.cos(angle + math.pi) * speed * 0.5,
+                                                       math.sin(angle + math.pi) * speed * 0.5],
+                                             frame=random.randint(0, 7))
+            self.game.sparks.emit(self.rect().center, 0, 5 + random.random())
+            self.game.sparks.emit(self.rect().center, math.pi, 5 + random.random())
+            self.game.screenshake = max(16, self.game.screenshake)
+            self.velocity[0] = -self.velocity[0]
+            if wall_of_flesh.is_dead():
+                self.game.sfx['wall_dead'].play()
+                continue
+            self.velocity[0] = -self.velocity[0] * 2
 
         self.dash_frame_count -= 1
         if self.dash_frame_count <= 0:
@@ -579,7 +639,7 @@ class Player(LivingEntity):
         else:
             self.max_health += 1
             self.health = self.max_health
-            
+
     def reset_powerups(self):
         self.has_fireball_powerup = False
         self.fireball_count = 0
@@ -621,74 +681,39 @@ class Player(LivingEntity):
             else:
                 self.game.display.blit(self.game.assets['empty_heart'], (x, y))  # Empty heart for lost health
 
-class JumpPowerUp(PhysicsEntity):
-    def __init__(self, game, pos, size):
-        super().__init__(game, 'jump_powerup', pos, size)
+class PowerUp(PhysicsEntity):
+    def __init__(self, game, p_type, pos, size):
+        super().__init__(game, p_type, pos, size)
         self.set_action('idle')
         self.bounce_timer = 0
         self.initial_y = pos[1]
 
     def update(self, tilemap, movement=(0, 0)):
+        ## Bobbing in place is all a powerup does, so it skips the physics update and its tile collision
         self.bounce_timer += 0.1
         bounce_offset = math.sin(self.bounce_timer) * 2
         self.pos[1] = self.initial_y + bounce_offset
 
-        super().update(tilemap, movement=movement)
-        self.set_action('idle')
+class JumpPowerUp(PowerUp):
+    def __init__(self, game, pos, size):
+        super().__init__(game, 'jump_powerup', pos, size)
 
-class FireballPowerUp(PhysicsEntity):
+class FireballPowerUp(PowerUp):
     def __init__(self, game, pos, size):
         super().__init__(game, 'fireball_powerup', pos, size)
-        self.set_action('idle')
-        self.bounce_timer = 0
-        self.initial_y = pos[1]
 
-    def update(self, tilemap, movement=(0, 0)):
-        self.bounce_timer += 0.1
-        bounce_offset = math.sin(self.bounce_timer) * 2
-        self.pos[1] = self.initial_y + bounce_offset
-
-        super().update(tilemap, movement=movement)
-        self.set_action('idle')
-
-    def render(self, surf, offset=(0, 0)):
-        super().render(surf, offset=offset)
-
-class DashPowerUp(PhysicsEntity):
+class DashPowerUp(PowerUp):
     def __init__(self, game, pos, size):
         super().__init__(game, 'dash_powerup', pos, size)
-        self.set_action('idle')  # Assuming an idle animation exists for powerups
-        self.bounce_timer = 0
-        self.initial_y = pos[1]
-
-    def update(self, tilemap, movement=(0, 0)):
-        self.bounce_timer += 0.1
-        bounce_offset = math.sin(self.bounce_timer) * 2
-        self.pos[1] = self.initial_y + bounce_offset
-
-        super().update(tilemap, movement=movement)
-        self.set_action('idle')
 
-    def render(self, surf, offset=(0, 0)):
-        super().render(surf, offset=offset)
-
-class HealthRestorePowerUp(PhysicsEntity):
+class HealthRestorePowerUp(PowerUp):
     def __init__(self, game, pos, size):
         super().__init__(game, 'health_restore_powerup', pos, size)
-        self.set_action('idle')
-        self.bounce_timer = 0
-        self.initial_y = pos[1]
-
-    def update(self, tilemap, movement=(0, 0)):
-        super().update(tilemap, movement)
-        self.bounce_timer += 0.1
-        bounce_offset = math.sin(self.bounce_timer) * 2
-        self.pos[1] = self.initial_y + bounce_offset
-
-    def render(self, surf, offset=(0, 0)):
-        super().render(surf, offset=offset)
 
 class Ufo(LivingEntity):
+    ## Never runs the physics update, so it has always held the first frame of its clip
+    anim_rate = 0
+
     def __init__(self, game, pos, size):
         super().__init__(game, 'ufo', pos, size, 3)
         self.hover_speed = 0.5
@@ -759,6 +784,8 @@ class Ufo(LivingEntity):
         super().render(surf, offset)
 
 class WallOfFlesh(LivingEntity):
+    anim_rate = 0
+
     def __init__(self, game, pos, size):
         super().__init__(game, 'wall_of_flesh', pos, size, 30)
         self.velocity = [.5, 0]  # Constantly move left
@@ -766,7 +793,7 @@ class WallOfFlesh(LivingEntity):
         self.walking = 0
         self.is_hit = False
         self.flicker_count = 0
-        
+
     def update(self, tilemap):
 
         # Move left constantly
@@ -774,21 +801,19 @@ class WallOfFlesh(LivingEntity):
         self.pos[0] += self.velocity[0]
         self.hitbox.x = self.pos[0]  # Update hitbox position X
         self.hitbox.y = self.pos[1]  # Update hitbox position Y
-        
-    def render(self, surf, offset):
+
         if self.is_hit:
-            self.render_damage(surf, offset, (255, 0, 0), (255, 255, 255))
             self.flicker_count += 1
             if self.flicker_count >= 10:
                 self.is_hit = False
                 self.flicker_count = 0
+
+    def render(self, surf, offset):
+        if self.is_hit:
+            self.render_damage(surf, offset, (255, 0, 0), (255, 255, 255))
         else:
             super().render(surf, offset=offset)
 
     def render_damage(self, surf, offset, color1, color2):
-        enemy_sprite = self.animation.img().copy()
-        if self.flicker_count % 2 == 0:
-            enemy_sprite.fill(color1, special_flags=pygame.BLEND_RGB_MULT)
-        else:
-            enemy_sprite.fill(color2, special_flags=pygame.BLEND_RGB_MULT)
-        surf.blit(enemy_sprite, (self.pos[0] - offset[0], self.pos[1] - offset[1]))
\ No newline at end of file
+        color = color1 if self.flicker_count % 2 == 0 else color2
+        surf.blit(self.animation.tinted_img(self.anim_frame(), color), (self.pos[0] - offset[0], self.pos[1] - offset[1]))
\ No newline at end of file
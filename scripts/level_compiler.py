@@ -0,0 +1,102 @@
+## Offline level compiler: turns every map in data/final_maps and data/maps into a runtime bundle (.map) next to its source.
+## A bundle is a binary map with the spawner tiles removed, plus merged collision rects, the spawner table and the
+## leaf spawner rects, so loading it rebuilds nothing. Maps whose source hash matches their bundle are skipped.
+## Run from the Soulsworn folder: python -m scripts.level_compiler [--force] [--autotile] [directory ...]
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+from scripts.tilemap import Tilemap
+from scripts.spatial import CHUNK_SIZE
+from scripts.level_loader import SPAWNER_PAIRS, leaf_rect
+from scripts.mapformat import MapFile, MAP_EXTENSION, source_hash, COUNT, COLLISION_ENTRY, SPAWNER_TABLE_ENTRY, RECT_ENTRY, encode_map, pos_flags
+
+MAP_DIRECTORIES = ['data/final_maps', 'data/maps']
+
+
+class BuildContext:
+    ## Stands in for the game: the compiler never loads images, so the tilemap falls back to tile sized boxes
+    def __init__(self):
+        self.assets = {}
+
+
+def bundle_path(path):
+    return os.path.splitext(path)[0] + MAP_EXTENSION
+
+
+def up_to_date(path, autotile):
+    if not os.path.exists(bundle_path(path)):
+        return False
+    try:
+        return MapFile.open(bundle_path(path)).source_hash() == source_hash(path, autotile)
+    except ValueError:
+        return False
+
+
+def collision_section(tilemap):
+    entries = []
+    chunk_px = CHUNK_SIZE * tilemap.tile_size
+    for (cx, cy), cells in sorted(tilemap.collision_grid.chunks.items()):
+        seen = set()
+        for rect in cells:
+            if rect is None or tuple(rect) in seen:
+                continue
+            seen.add(tuple(rect))
+            x0 = (rect.x - cx * chunk_px) // tilemap.tile_size
+            y0 = (rect.y - cy * chunk_px) // tilemap.tile_size
+            entries.append(COLLISION_ENTRY.pack(cx, cy, x0, y0, x0 + rect.width // tilemap.tile_size, y0 + rect.height // tilemap.tile_size))
+    return COUNT.pack(len(entries)) + b''.join(entries)
+
+
+def compile_map(path, autotile=False):
+    tilemap = Tilemap(BuildContext(), tile_size=16)
+    tilemap.load(path)
+    ## Off by default: the shipped maps keep hand-picked variants that a full pass would overwrite
+    if autotile:
+        tilemap.autotile()
+
+    leaf_rects = [leaf_rect(tree) for tree in tilemap.extract([('large_decor', 2)], keep=True)]
+    spawners = tilemap.extract(SPAWNER_PAIRS)
+    tilemap.update_collisions()
+
+    sections = [
+        (b'COLL', collision_section(tilemap)),
+        (b'STAB', COUNT.pack(len(spawners)) + b''.join(SPAWNER_TABLE_ENTRY.pack(spawner['variant'], pos_flags(spawner['pos']), spawner['pos'][0], spawner['pos'][1]) for spawner in spawners)),
+        (b'LEAF', COUNT.pack(len(leaf_rects)) + b''.join(RECT_ENTRY.pack(rect.x, rect.y, rect.width, rect.height) for rect in leaf_rects)),
+        (b'SRCH', source_hash(path, autotile)),
+    ]
+    map_data = {'tilemap': tilemap.json_tilemap(), 'tile_size': tilemap.tile_size, 'offgrid': tilemap.offgrid_tiles}
+    with open(bundle_path(path), 'wb') as f:
+        f.write(encode_map(map_data, sections))
+    return bundle_path(path)
+
+
+def map_sources(directories):
+    sources = []
+    for directory in directories:
+        if os.path.isdir(directory):
+            for name in sorted(os.listdir(directory)):
+                if name.endswith('.json'):
+                    sources.append(os.path.join(directory, name))
+    return sources
+
+
+def compile_all(directories=MAP_DIRECTORIES, force=False, autotile=False):
+    sources = map_sources(directories)
+    stale = [path for path in sources if force or not up_to_date(path, autotile)]
+    for path in sources:
+        if path not in stale:
+            print('up to date', path)
+    if stale:
+        with ProcessPoolExecutor() as pool:
+            for path in pool.map(compile_map, stale, [autotile] * len(stale)):
+                print('compiled', path)
+    return stale
+
+
+if __name__ == '__main__':
+    args = sys.argv[1:]
+    force = '--force' in args
+    autotile = '--autotile' in args
+    directories = [arg for arg in args if not arg.startswith('--')] or MAP_DIRECTORIES
+    compile_all(directories, force=force, autotile=autotile)
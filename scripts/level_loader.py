@@ -0,0 +1,174 @@
+import os
+import sys
+import pygame
+from concurrent.futures import ThreadPoolExecutor
+
+from scripts.tilemap import Tilemap
+from scripts.mapformat import MapFile, MAP_EXTENSION, source_hash
+
+MAP_DIRECTORY = 'data/maps/'
+
+## Binary maps with more chunks than this are streamed around the camera instead of loaded whole
+STREAM_CHUNK_THRESHOLD = 256
+STREAM_RESIDENT_CHUNKS = 64
+## Simulation steps a level is played before the next one starts loading. Parsing holds the GIL on the loader thread,
+## so starting it straight away would land on the new level's first frames
+PRELOAD_DELAY = 180
+## Steps of the camera's opening pan whose chunks are baked ahead of it
+PATH_STEPS = 180
+PRELOAD_SWITCH_INTERVAL = 0.0005
+SPAWNER_PAIRS = [('spawners', 0), ('spawners', 1), ('spawners', 2), ('spawners', 3), ('spawners', 4),
+                 ('spawners', 5), ('spawners', 6), ('spawners', 7), ('spawners', 8), ('spawners', 9)]
+
+
+def map_path(map_id):
+    ## Prefer the binary map unless the json source has been edited since it was written. A compiled bundle is used
+    ## whenever it was built from the current json, however a checkout or copy has left the file times
+    json_path = MAP_DIRECTORY + str(map_id) + '.json'
+    path = MAP_DIRECTORY + str(map_id) + MAP_EXTENSION
+    if not os.path.exists(path):
+        return json_path
+    if not os.path.exists(json_path) or os.path.getmtime(path) >= os.path.getmtime(json_path) or bundle_matches(path, json_path):
+        return path
+    return json_path
+
+
+def bundle_matches(path, json_path):
+    try:
+        map_file = MapFile.open(path)
+    except ValueError:
+        return False
+    return map_file.is_bundle() and map_file.source_hash() in (source_hash(json_path, False), source_hash(json_path, True))
+
+
+def leaf_rect(tree):
+    return pygame.Rect(4 + tree['pos'][0], 4 + tree['pos'][1], 23, 13)
+
+
+class PreparedLevel:
+    def __init__(self, map_id, tilemap, leaf_spawners, spawners):
+        self.map_id = map_id
+        self.tilemap = tilemap
+        self.leaf_spawners = leaf_spawners
+        self.spawners = spawners
+
+        ## Chunks still to be baked on the main thread: the ones on screen before the level is shown, then the ones the
+        ## camera passes while it eases to the player
+        self.warm_chunks = None
+        self.path_chunks = None
+
+    def player_spawn(self):
+        spawn = (0, 0)
+        for spawner in self.spawners:
+            if spawner['variant'] == 0:
+                spawn = spawner['pos']
+        return spawn
+
+
+def prepare_level(game, map_id):
+    ## Runs on the loader thread, so nothing in here may create or draw surfaces
+    path = map_path(map_id)
+    map_file = MapFile.open(path) if path.endswith(MAP_EXTENSION) else None
+    tilemap = Tilemap(game, tile_size=16)
+    if map_file is not None and len(map_file.chunk_index()) > STREAM_CHUNK_THRESHOLD:
+        tilemap.stream(path, max_chunks=STREAM_RESIDENT_CHUNKS)
+    else:
+        tilemap.load(path)
+
+    ## Bundles from scripts.level_compiler already hold both tables and have no spawner tiles left to extract
+    if map_file is not None and map_file.is_bundle():
+        return PreparedLevel(map_id, tilemap, [pygame.Rect(rect) for rect in map_file.leaf_rects()], map_file.spawner_table())
+
+    leaf_spawners = []
+    for tree in tilemap.extract([('large_decor', 2)], keep=True):
+        leaf_spawners.append(leaf_rect(tree))
+
+    return PreparedLevel(map_id, tilemap, leaf_spawners, tilemap.extract(SPAWNER_PAIRS))
+
+
+class LevelLoader:
+    def __init__(self, game):
+        self.game = game
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.switch_interval = sys.getswitchinterval()
+        self.pending = {}
+        ## Map to preload once the current level has settled, and the steps left until then
+        self.queued = None
+        self.queued_delay = 0
+
+        ## The level being played. The game never edits its tilemap after extraction, so restarting it reuses this
+        self.current = None
+
+    def preload(self, map_id, delay=0):
+        if map_id in self.pending or (self.current and self.current.map_id == map_id):
+            return
+        if delay:
+            self.queued = map_id
+            self.queued_delay = delay
+            return
+        self.queued = None
+        self.pending[map_id] = self.executor.submit(prepare_level, self.game, map_id)
+        ## While the loader thread runs, the main thread gets the GIL back within PRELOAD_SWITCH_INTERVAL after every
+        ## blit or sleep that released it, instead of waiting out the default 5 ms
+        sys.setswitchinterval(PRELOAD_SWITCH_INTERVAL)
+        self.pending[map_id].add_done_callback(lambda future: sys.setswitchinterval(self.switch_interval))
+
+    def update(self):
+        ## Once per simulation step. Bakes the current level's first chunks one at a time, returning True until the
+        ## starting screen is done, then counts down to the queued preload
+        if self.current is not None and self.warm(self.current):
+            return True
+        if self.queued is not None:
+            self.queued_delay -= 1
+            if self.queued_delay <= 0:
+                self.preload(self.queued)
+        return False
+
+    def advance(self, map_id):
+        ## Spreads the main-thread part of loading map_id over the frames of a transition
+        future = self.pending.get(map_id)
+        if future is None:
+            ## Beaten before the queued preload started
+            self.preload(map_id)
+        elif future.done():
+            self.warm(future.result())
+
+    def warm(self, level):
+        ## Bakes one chunk of level, returning True while the starting screen still has chunks left
+        if level.warm_chunks is None:
+            self.plan_chunks(level)
+        for chunks in [level.warm_chunks, level.path_chunks]:
+            while chunks:
+                chunk = chunks.pop(0)
+                if chunk not in level.tilemap.chunk_surfaces:
+                    level.tilemap.bake_chunk(chunk)
+                    return chunks is level.warm_chunks
+        return False
+
+    def plan_chunks(self, level):
+        ## The camera starts at (0, 0) and closes 1/30 of the distance to the player every step, as in Game.update_game
+        size = self.game.display.get_size()
+        spawn = level.player_spawn()
+        level.warm_chunks = level.tilemap.chunks_in(pygame.Rect(0, 0, size[0], size[1]))
+        level.path_chunks = []
+        seen = set(level.warm_chunks)
+        scroll = [0, 0]
+        target = (spawn[0] - size[0] / 2, spawn[1] - size[1] / 2)
+        for step in range(PATH_STEPS):
+            scroll[0] += (target[0] - scroll[0]) / 30
+            scroll[1] += (target[1] - scroll[1]) / 30
+            for chunk in level.tilemap.chunks_in(pygame.Rect(int(scroll[0]), int(scroll[1]), size[0], size[1])):
+                if chunk not in seen:
+                    seen.add(chunk)
+                    level.path_chunks.append(chunk)
+
+    def take(self, map_id):
+        if self.current and self.current.map_id == map_id:
+            return self.current
+        if map_id not in self.pending:
+            self.preload(map_id)
+        level = self.pending.pop(map_id).result()
+        self.pending.clear()
+        self.queued = None
+        self.current = level
+        return level
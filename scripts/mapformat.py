@@ -0,0 +1,321 @@
+## Binary map format
+## Header: magic, version, section count, then a directory of (tag, offset, length) entries.
+## Sections:
+##   META  tile size, grid origin and size
+##   TYPE  tile type names, indexed by the layers and tables below
+##   TILE  dense grid layer of type index + 1 (0 is an empty cell)
+##   VARI  dense grid layer of variants
+##   OFFG  offgrid tiles: type, variant, flags, x, y
+##   SPWN  spawner tiles (on or off grid): variant, flags, offgrid index, x, y
+##   CHNK  chunk directory: chunk size in cells, then x, y and a slice of CIDX for every non-empty chunk (version 2)
+##   CIDX  OFFG entry indices grouped by the chunk holding each tile's position (version 2)
+## Compiled level bundles (scripts.level_compiler) add:
+##   COLL  merged collision rects: chunk x, y and the cell bounds inside the chunk
+##   STAB  spawner table in extract order with pixel positions: variant, flags, x, y
+##   LEAF  leaf spawner rects: x, y, width, height
+##   SRCH  hash of the source map the bundle was compiled from
+import hashlib
+import json
+import math
+import mmap
+import struct
+import sys
+
+from scripts.spatial import CHUNK_SIZE, CHUNK_SHIFT
+
+MAP_MAGIC = b'SSMP'
+MAP_VERSION = 2
+SUPPORTED_VERSIONS = (1, 2)
+MAP_EXTENSION = '.map'
+
+SPAWNER_TYPE = 'spawners'
+
+## Bump whenever the bundle contents change so every map is rebuilt
+COMPILER_VERSION = 1
+
+HEADER = struct.Struct('<4sHH')
+SECTION = struct.Struct('<4sII')
+META = struct.Struct('<HiiII')
+COUNT = struct.Struct('<I')
+OFFGRID_ENTRY = struct.Struct('<BBBdd')
+SPAWNER_ENTRY = struct.Struct('<BBIdd')
+CHUNK_HEADER = struct.Struct('<II')
+CHUNK_ENTRY = struct.Struct('<iiII')
+CHUNK_TILE = struct.Struct('<I')
+COLLISION_ENTRY = struct.Struct('<iiBBBB')
+SPAWNER_TABLE_ENTRY = struct.Struct('<BBdd')
+RECT_ENTRY = struct.Struct('<iiII')
+
+FLAG_ONGRID = 1
+FLAG_INT_X = 2
+FLAG_INT_Y = 4
+
+
+def pos_flags(pos):
+    flags = 0
+    if isinstance(pos[0], int):
+        flags |= FLAG_INT_X
+    if isinstance(pos[1], int):
+        flags |= FLAG_INT_Y
+    return flags
+
+
+def flagged_pos(flags, x, y):
+    return [int(x) if flags & FLAG_INT_X else x, int(y) if flags & FLAG_INT_Y else y]
+
+
+def encode_map(map_data, extra_sections=()):
+    tiles = list(map_data['tilemap'].values())
+    offgrid = map_data['offgrid']
+
+    types = []
+    type_ids = {}
+    for tile in tiles + offgrid:
+        if tile['type'] not in type_ids and tile['type'] != SPAWNER_TYPE:
+            type_ids[tile['type']] = len(types)
+            types.append(tile['type'])
+    if len(types) > 255:
+        raise ValueError('too many tile types for the binary map format')
+
+    spawners = []
+    grid_tiles = []
+    for tile in tiles:
+        if tile['type'] == SPAWNER_TYPE:
+            spawners.append(SPAWNER_ENTRY.pack(tile['variant'], FLAG_ONGRID | FLAG_INT_X | FLAG_INT_Y, 0, tile['pos'][0], tile['pos'][1]))
+        else:
+            grid_tiles.append(tile)
+
+    if grid_tiles:
+        origin = (min(tile['pos'][0] for tile in grid_tiles), min(tile['pos'][1] for tile in grid_tiles))
+        width = max(tile['pos'][0] for tile in grid_tiles) - origin[0] + 1
+        height = max(tile['pos'][1] for tile in grid_tiles) - origin[1] + 1
+    else:
+        origin = (0, 0)
+        width = height = 0
+
+    type_layer = bytearray(width * height)
+    variant_layer = bytearray(width * height)
+    for tile in grid_tiles:
+        i = (tile['pos'][1] - origin[1]) * width + tile['pos'][0] - origin[0]
+        type_layer[i] = type_ids[tile['type']] + 1
+        variant_layer[i] = tile['variant']
+
+    chunks = {}
+    for tile in grid_tiles:
+        chunks.setdefault((tile['pos'][0] >> CHUNK_SHIFT, tile['pos'][1] >> CHUNK_SHIFT), [])
+
+    offgrid_entries = []
+    chunk_px = CHUNK_SIZE * map_data['tile_size']
+    for i, tile in enumerate(offgrid):
+        if tile['type'] == SPAWNER_TYPE:
+            spawners.append(SPAWNER_ENTRY.pack(tile['variant'], pos_flags(tile['pos']), i, tile['pos'][0], tile['pos'][1]))
+        else:
+            chunk = (math.floor(tile['pos'][0]) // chunk_px, math.floor(tile['pos'][1]) // chunk_px)
+            chunks.setdefault(chunk, []).append(len(offgrid_entries))
+            offgrid_entries.append(OFFGRID_ENTRY.pack(type_ids[tile['type']], tile['variant'], pos_flags(tile['pos']), tile['pos'][0], tile['pos'][1]))
+
+    chunk_directory = [CHUNK_HEADER.pack(CHUNK_SIZE, len(chunks))]
+    chunk_tiles = []
+    for chunk in sorted(chunks):
+        chunk_directory.append(CHUNK_ENTRY.pack(chunk[0], chunk[1], len(chunk_tiles), len(chunks[chunk])))
+        chunk_tiles += chunks[chunk]
+
+    type_table = bytearray(COUNT.pack(len(types)))
+    for name in types:
+        encoded = name.encode('utf-8')
+        type_table += bytes([len(encoded)]) + encoded
+
+    sections = [
+        (b'META', META.pack(map_data['tile_size'], origin[0], origin[1], width, height)),
+        (b'TYPE', bytes(type_table)),
+        (b'TILE', bytes(type_layer)),
+        (b'VARI', bytes(variant_layer)),
+        (b'OFFG', COUNT.pack(len(offgrid_entries)) + b''.join(offgrid_entries)),
+        (b'SPWN', COUNT.pack(len(spawners)) + b''.join(spawners)),
+        (b'CHNK', b''.join(chunk_directory)),
+        (b'CIDX', b''.join(CHUNK_TILE.pack(i) for i in chunk_tiles)),
+    ]
+    return pack_sections(sections + list(extra_sections))
+
+
+def pack_sections(sections):
+    offset = HEADER.size + SECTION.size * len(sections)
+    directory = []
+    for tag, payload in sections:
+        directory.append(SECTION.pack(tag, offset, len(payload)))
+        offset += len(payload)
+    return HEADER.pack(MAP_MAGIC, MAP_VERSION, len(sections)) + b''.join(directory) + b''.join(payload for tag, payload in sections)
+
+
+def source_hash(path, autotile):
+    ## What a bundle compiled from the map source at path records in SRCH
+    digest = hashlib.sha1(bytes([COMPILER_VERSION, autotile]))
+    with open(path, 'rb') as f:
+        digest.update(f.read())
+    return digest.digest()
+
+
+class MapFile:
+    def __init__(self, buffer):
+        self.buffer = memoryview(buffer)
+        magic, version, section_count = HEADER.unpack_from(self.buffer, 0)
+        if magic != MAP_MAGIC:
+            raise ValueError('not a Soulsworn map file')
+        if version not in SUPPORTED_VERSIONS:
+            raise ValueError('unsupported map version ' + str(version))
+
+        self.sections = {}
+        for i in range(section_count):
+            tag, offset, length = SECTION.unpack_from(self.buffer, HEADER.size + i * SECTION.size)
+            self.sections[tag.decode('ascii')] = self.buffer[offset:offset + length]
+
+        self.tile_size, origin_x, origin_y, self.width, self.height = META.unpack_from(self.sections['META'], 0)
+        self.origin = (origin_x, origin_y)
+
+        self.types = []
+        type_table = self.sections['TYPE']
+        offset = COUNT.size
+        for i in range(COUNT.unpack_from(type_table, 0)[0]):
+            length = type_table[offset]
+            self.types.append(bytes(type_table[offset + 1:offset + 1 + length]).decode('utf-8'))
+            offset += 1 + length
+
+    @classmethod
+    def open(cls, path):
+        with open(path, 'rb') as f:
+            return cls(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+    def tiles(self):
+        ## Yields (x, y, type, variant) for every filled grid cell, row by row
+        type_layer = self.sections['TILE']
+        variant_layer = self.sections['VARI']
+        types = self.types
+        for row in range(self.height):
+            start = row * self.width
+            row_types = bytes(type_layer[start:start + self.width])
+            if not any(row_types):
+                continue
+            y = self.origin[1] + row
+            for column, type_id in enumerate(row_types):
+                if type_id:
+                    yield self.origin[0] + column, y, types[type_id - 1], variant_layer[start + column]
+
+    def chunk_tiles(self, cx, cy):
+        ## Yields (x, y, type, variant) for the filled grid cells of one chunk, read straight from the dense layers
+        type_layer = self.sections['TILE']
+        variant_layer = self.sections['VARI']
+        types = self.types
+        x0 = max(cx << CHUNK_SHIFT, self.origin[0])
+        x1 = min((cx + 1) << CHUNK_SHIFT, self.origin[0] + self.width)
+        if x0 >= x1:
+            return
+        for y in range(max(cy << CHUNK_SHIFT, self.origin[1]), min((cy + 1) << CHUNK_SHIFT, self.origin[1] + self.height)):
+            start = (y - self.origin[1]) * self.width - self.origin[0]
+            row_types = bytes(type_layer[start + x0:start + x1])
+            for column, type_id in enumerate(row_types):
+                if type_id:
+                    yield x0 + column, y, types[type_id - 1], variant_layer[start + x0 + column]
+
+    def chunk_index(self):
+        ## (cx, cy) -> OFFG entry indices for every chunk with grid or offgrid tiles
+        chunks = {}
+        if 'CHNK' in self.sections:
+            directory = self.sections['CHNK']
+            chunk_size, count = CHUNK_HEADER.unpack_from(directory, 0)
+            if chunk_size != CHUNK_SIZE:
+                raise ValueError('map chunk size ' + str(chunk_size) + ' does not match ' + str(CHUNK_SIZE))
+            indices = [entry[0] for entry in CHUNK_TILE.iter_unpack(self.sections['CIDX'])]
+            for cx, cy, first, length in CHUNK_ENTRY.iter_unpack(directory[CHUNK_HEADER.size:]):
+                chunks[(cx, cy)] = indices[first:first + length]
+            return chunks
+
+        ## Version 1 files have no directory, so build it from a scan
+        for x, y, tile_type, variant in self.tiles():
+            chunks.setdefault((x >> CHUNK_SHIFT, y >> CHUNK_SHIFT), [])
+        chunk_px = CHUNK_SIZE * self.tile_size
+        for i, tile in enumerate(self.offgrid()):
+            chunks.setdefault((math.floor(tile['pos'][0]) // chunk_px, math.floor(tile['pos'][1]) // chunk_px), []).append(i)
+        return chunks
+
+    def offgrid_entry(self, i):
+        type_id, variant, flags, x, y = OFFGRID_ENTRY.unpack_from(self.sections['OFFG'], COUNT.size + i * OFFGRID_ENTRY.size)
+        return {'type': self.types[type_id], 'variant': variant, 'pos': flagged_pos(flags, x, y)}
+
+    def offgrid(self):
+        section = self.sections['OFFG']
+        for type_id, variant, flags, x, y in OFFGRID_ENTRY.iter_unpack(section[COUNT.size:]):
+            yield {'type': self.types[type_id], 'variant': variant, 'pos': flagged_pos(flags, x, y)}
+
+    def spawners(self):
+        ## Yields (offgrid index or None, tile) for every spawner
+        section = self.sections['SPWN']
+        for variant, flags, index, x, y in SPAWNER_ENTRY.iter_unpack(section[COUNT.size:]):
+            tile = {'type': SPAWNER_TYPE, 'variant': variant, 'pos': flagged_pos(flags, x, y)}
+            yield (None if flags & FLAG_ONGRID else index), tile
+
+    def offgrid_tiles(self):
+        ## Offgrid tiles in their original order, with offgrid spawners put back in place
+        tiles = list(self.offgrid())
+        for index, tile in sorted((spawner for spawner in self.spawners() if spawner[0] is not None), key=lambda spawner: spawner[0]):
+            tiles.insert(index, tile)
+        return tiles
+
+    def is_bundle(self):
+        return 'STAB' in self.sections
+
+    def collision_runs(self):
+        ## (cx, cy) -> [(x0, y0, x1, y1)] merged cell bounds, or None when the file has no collision section
+        if 'COLL' not in self.sections:
+            return None
+        runs = {}
+        section = self.sections['COLL']
+        for cx, cy, x0, y0, x1, y1 in COLLISION_ENTRY.iter_unpack(section[COUNT.size:]):
+            runs.setdefault((cx, cy), []).append((x0, y0, x1, y1))
+        return runs
+
+    def spawner_table(self):
+        section = self.sections['STAB']
+        table = []
+        for variant, flags, x, y in SPAWNER_TABLE_ENTRY.iter_unpack(section[COUNT.size:]):
+            table.append({'type': SPAWNER_TYPE, 'variant': variant, 'pos': flagged_pos(flags, x, y)})
+        return table
+
+    def leaf_rects(self):
+        return list(RECT_ENTRY.iter_unpack(self.sections['LEAF'][COUNT.size:]))
+
+    def source_hash(self):
+        if 'SRCH' in self.sections:
+            return bytes(self.sections['SRCH'])
+
+    def to_json(self):
+        tilemap = {}
+        for x, y, tile_type, variant in self.tiles():
+            tilemap[str(x) + ';' + str(y)] = {'type': tile_type, 'variant': variant, 'pos': [x, y]}
+        for index, tile in self.spawners():
+            if index is None:
+                tilemap[str(tile['pos'][0]) + ';' + str(tile['pos'][1])] = tile
+        return {'tilemap': tilemap, 'tile_size': self.tile_size, 'offgrid': self.offgrid_tiles()}
+
+
+def json_to_binary(src, dst):
+    with open(src, 'r') as f:
+        map_data = json.load(f)
+    with open(dst, 'wb') as f:
+        f.write(encode_map(map_data))
+
+
+def binary_to_json(src, dst):
+    map_data = MapFile.open(src).to_json()
+    with open(dst, 'w') as f:
+        json.dump(map_data, f)
+
+
+## python -m scripts.mapformat <in.json|in.map> <out.map|out.json>
+if __name__ == '__main__':
+    if len(sys.argv) != 3:
+        print('usage: python -m scripts.mapformat <source> <destination>')
+        sys.exit(1)
+    if sys.argv[1].endswith(MAP_EXTENSION):
+        binary_to_json(sys.argv[1], sys.argv[2])
+    else:
+        json_to_binary(sys.argv[1], sys.argv[2])
@@ -0,0 +1,66 @@
+import weakref
+
+import pygame
+
+OUTLINE_COLOR = (0, 0, 0, 180)
+## Where the silhouette is stamped, relative to the sprite, to make its 1px rim
+OUTLINE_OFFSETS = [(-1, 0), (1, 0), (0, -1), (0, 1)]
+
+
+def make_outline(img):
+    ## Rim surface one pixel bigger than img on every side, drawn at img's position - (1, 1).
+    ## Pixels under the sprite itself are cleared: the sprite covers them, and runs of clear pixels blit for free
+    mask = pygame.mask.from_surface(img)
+    silhouette = mask.to_surface(setcolor=OUTLINE_COLOR, unsetcolor=(0, 0, 0, 0))
+    outline = pygame.Surface((img.get_width() + 2, img.get_height() + 2), pygame.SRCALPHA)
+    for offset in OUTLINE_OFFSETS:
+        outline.blit(silhouette, (offset[0] + 1, offset[1] + 1))
+    body = pygame.Mask(outline.get_size())
+    body.draw(mask, (1, 1))
+    body.to_surface(outline, setcolor=(0, 0, 0, 0), unsetcolor=None)
+    outline.set_alpha(255, pygame.RLEACCEL)
+    return outline
+
+
+class OutlinedLayer:
+    ## Stands in for the sprite layer while drawing: every blit lands on surf as usual and queues the image's
+    ## cached outline, which draw_outlines puts on the layer underneath
+    def __init__(self, surf):
+        self.surf = surf
+        self.queued = []
+
+        ## Keyed by the sprite surface itself, so outlines of rebaked tile chunks go away with the old chunk
+        self.outlines = weakref.WeakKeyDictionary()
+
+    def get_width(self):
+        return self.surf.get_width()
+
+    def get_height(self):
+        return self.surf.get_height()
+
+    def get_size(self):
+        return self.surf.get_size()
+
+    def outline(self, img):
+        outline = self.outlines.get(img)
+        if outline is None:
+            outline = make_outline(img)
+            self.outlines[img] = outline
+        return outline
+
+    def queue(self, img, pos):
+        ## blit truncates float positions, so the outline is shifted after truncating to stay in step
+        self.queued.append((self.outline(img), (int(pos[0]) - 1, int(pos[1]) - 1)))
+
+    def blit(self, img, pos):
+        self.queue(img, pos)
+        return self.surf.blit(img, pos)
+
+    def blits(self, blit_sequence, doreturn=True):
+        for img, pos in blit_sequence:
+            self.queue(img, pos)
+        return self.surf.blits(blit_sequence, doreturn=doreturn)
+
+    def draw_outlines(self, surf):
+        surf.blits(self.queued, doreturn=False)
+        self.queued = []
@@ -1,24 +1,93 @@
-class Particle:
-    def __init__(self, game, particle_type, pos, velocity=[0, 0], frame = 0):
+import numpy as np
+
+## Particle types that drift side to side as they fall
+SWAY_TYPES = {'leaf'}
+
+
+class ParticleSystem:
+    ## Every live particle as rows of preallocated arrays, rows past count are free
+    def __init__(self, game, capacity=4096):
         self.game = game
-        self.type = particle_type
-        self.pos = list(pos)
-        self.velocity = list(velocity)
-        self.animation = self.game.assets['particle/' + particle_type].copy()
-        self.animation.frame = frame
+        self.capacity = capacity
+        self.count = 0
+        self.pos = np.zeros((capacity, 2))
+        self.velocity = np.zeros((capacity, 2))
+        self.frame = np.zeros(capacity, dtype=np.int32)
+        self.done = np.zeros(capacity, dtype=bool)
+        self.type = np.zeros(capacity, dtype=np.int32)
+
+        ## One entry per particle/* animation: its images are laid out back to back in self.images starting at first_image
+        self.type_ids = {}
+        self.images = []
+        self.half_sizes = []
+        first_image = []
+        img_duration = []
+        last_frame = []
+        frame_count = []
+        sway = []
+        for name, animation in game.assets.items():
+            if name.startswith('particle/'):
+                particle_type = name[len('particle/'):]
+                self.type_ids[particle_type] = len(first_image)
+                first_image.append(len(self.images))
+                img_duration.append(animation.img_duration)
+                last_frame.append(animation.img_duration * len(animation.images) - 1)
+                frame_count.append(len(animation.images))
+                sway.append(particle_type in SWAY_TYPES)
+                for img in animation.images:
+                    self.images.append(img)
+                    self.half_sizes.append((img.get_width() // 2, img.get_height() // 2))
+        self.first_image = np.array(first_image, dtype=np.int32)
+        self.img_duration = np.array(img_duration, dtype=np.int32)
+        self.last_frame = np.array(last_frame, dtype=np.int32)
+        self.frame_count = np.array(frame_count, dtype=np.int32)
+        self.sway = np.array(sway, dtype=bool)
+        self.half_sizes = np.array(self.half_sizes, dtype=np.int32).reshape(-1, 2)
+
+    def __len__(self):
+        return self.count
+
+    def clear(self):
+        self.count = 0
+
+    def emit(self, particle_type, pos, velocity=(0, 0), frame=0):
+        ## Once the buffer is full new particles are dropped until old ones die
+        if self.count == self.capacity:
+            return
+        i = self.count
+        self.pos[i] = (pos[0], pos[1])
+        self.velocity[i] = velocity
+        self.frame[i] = frame
+        self.done[i] = False
+        self.type[i] = self.type_ids[particle_type]
+        self.count += 1
 
     def update(self):
-        kill = False
-        if self.animation.done:
-            kill = True
+        ## A particle dies on the step after its animation finishes, the same step it would have been removed before
+        n = self.count
+        kill = self.done[:n].copy()
+        self.pos[:n] += self.velocity[:n]
+
+        last_frame = self.last_frame[self.type[:n]]
+        self.frame[:n] = np.minimum(self.frame[:n] + 1, last_frame)
+        self.done[:n] |= self.frame[:n] >= last_frame
 
-        self.pos[0] += self.velocity[0]
-        self.pos[1] += self.velocity[1]
+        sway = self.sway[self.type[:n]]
+        self.pos[:n, 0][sway] += np.sin(self.frame[:n][sway] * 0.035) * 0.3
 
-        self.animation.update()
+        if kill.any():
+            keep = ~kill
+            kept = int(np.count_nonzero(keep))
+            for array in (self.pos, self.velocity, self.frame, self.done, self.type):
+                array[:kept] = array[:n][keep]
+            self.count = kept
 
-        return kill
-    
     def render(self, surf, offset=(0, 0)):
-        img = self.animation.img()
-        surf.blit(img, (self.pos[0] - offset[0] - img.get_width() // 2, self.pos[1] - offset[1] - img.get_height() // 2))
\ No newline at end of file
+        n = self.count
+        types = self.type[:n]
+        image = self.first_image[types] + np.minimum(self.frame[:n] // self.img_duration[types], self.frame_count[types] - 1)
+        half = self.half_sizes[image]
+        xs = (self.pos[:n, 0] - offset[0] - half[:, 0]).tolist()
+        ys = (self.pos[:n, 1] - offset[1] - half[:, 1]).tolist()
+        images = self.images
+        surf.blits([(images[i], (x, y)) for i, x, y in zip(image.tolist(), xs, ys)], doreturn=False)
@@ -0,0 +1,69 @@
+import pygame
+from pygame._sdl2.video import Window, Renderer, Texture
+
+
+class Presenter:
+    ## Puts finished frames in the window. Menus draw onto screen, the game hands over its own canvas (canvas_size).
+    ## 'renderer': frames go up as textures and SDL's renderer scales them, on the GPU or with its software renderer
+    ##   when there is none (SDL_RENDER_DRIVER=software forces it). Canvases that fit are drawn at a whole multiple
+    ##   of their size, centred in the window
+    ## 'transform': the old path, every frame is stretched over the whole window with pygame.transform.scale
+    def __init__(self, screen_size, canvas_size, window_size=None, backend='renderer'):
+        self.backend = backend
+        if window_size is None:
+            window_size = screen_size
+
+        if backend == 'renderer':
+            ## SCALED is the only way to get a renderer for the display module's window. It also keeps the window
+            ## from shrinking below the display surface, so that is made canvas sized and otherwise left unused.
+            ## The renderer's own logical scaling is switched off so frames are placed by frame_rect
+            pygame.display.set_mode(canvas_size, pygame.SCALED)
+            self.screen = pygame.Surface(screen_size)
+            self.window = Window.from_display_module()
+            self.window.size = window_size
+            self.renderer = Renderer.from_window(self.window)
+            self.renderer.logical_size = (0, 0)
+            self.textures = {}
+        else:
+            self.window = pygame.display.set_mode(window_size)
+            self.screen = self.window if window_size == screen_size else pygame.Surface(screen_size)
+
+    def window_size(self):
+        if self.backend == 'renderer':
+            return self.window.size
+        return self.window.get_size()
+
+    def frame_rect(self, size):
+        window_w, window_h = self.window_size()
+        if self.backend != 'renderer':
+            return pygame.Rect(0, 0, window_w, window_h)
+        scale = min(window_w / size[0], window_h / size[1])
+        if scale >= 1:
+            scale = int(scale)
+        w, h = int(size[0] * scale), int(size[1] * scale)
+        return pygame.Rect((window_w - w) // 2, (window_h - h) // 2, w, h)
+
+    def canvas_pos(self, pos, size):
+        ## Window position (mouse) -> position on a canvas of size as last presented
+        rect = self.frame_rect(size)
+        return ((pos[0] - rect.x) * size[0] / rect.w, (pos[1] - rect.y) * size[1] / rect.h)
+
+    def present(self, surf, offset=(0, 0)):
+        ## offset shifts the frame by canvas pixels (screenshake)
+        rect = self.frame_rect(surf.get_size())
+        rect.x += int(offset[0] * rect.w / surf.get_width())
+        rect.y += int(offset[1] * rect.h / surf.get_height())
+        if self.backend == 'renderer':
+            texture = self.textures.get(surf.get_size())
+            if texture is None:
+                texture = Texture(self.renderer, surf.get_size(), streaming=True)
+                self.textures[surf.get_size()] = texture
+            texture.update(surf)
+            self.renderer.draw_color = (0, 0, 0, 255)
+            self.renderer.clear()
+            texture.draw(dstrect=rect)
+            self.renderer.present()
+        else:
+            if surf is not self.window:
+                self.window.blit(pygame.transform.scale(surf, rect.size), rect.topleft)
+            pygame.display.update()
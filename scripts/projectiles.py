@@ -0,0 +1,110 @@
+import numpy as np
+
+## Projectile kinds
+PROJECTILE = 0
+FIREBALL = 1
+EGG = 2
+SWORD = 3
+
+OWNER_ENEMY = 0
+OWNER_PLAYER = 1
+
+## Per kind: pixels moved per step for each unit of direction, steps before expiring, who fired it and the sound of a hit
+SPEEDS = np.array([1, 2.5, 1, 8])
+LIFETIMES = np.array([720, 360, 720, 3])
+OWNERS = [OWNER_ENEMY, OWNER_PLAYER, OWNER_ENEMY, OWNER_PLAYER]
+HIT_SOUNDS = ['projectile_hit', 'fireball_hit', 'egg_hit', 'sword_hit_tile']
+
+
+class ProjectileStore:
+    ## Every live projectile as rows of parallel arrays, rows past count are free
+    def __init__(self, images, capacity=256):
+        ## images[kind] is (facing left, facing right), or None for kinds that are never drawn
+        self.images = images
+        self.count = 0
+        self.pos = np.zeros((capacity, 2))
+        self.vel = np.zeros((capacity, 2))
+        self.age = np.zeros(capacity, dtype=np.int32)
+        self.owner = np.zeros(capacity, dtype=np.int8)
+        self.kind = np.zeros(capacity, dtype=np.int8)
+
+    def __len__(self):
+        return self.count
+
+    def clear(self):
+        self.count = 0
+
+    def grow(self):
+        capacity = len(self.age) * 2
+        self.pos = np.resize(self.pos, (capacity, 2))
+        self.vel = np.resize(self.vel, (capacity, 2))
+        self.age = np.resize(self.age, capacity)
+        self.owner = np.resize(self.owner, capacity)
+        self.kind = np.resize(self.kind, capacity)
+
+    def spawn(self, kind, pos, direction):
+        if self.count == len(self.age):
+            self.grow()
+        i = self.count
+        self.pos[i] = pos
+        self.vel[i] = (direction * SPEEDS[kind], 0)
+        self.age[i] = 0
+        self.owner[i] = OWNERS[kind]
+        self.kind[i] = kind
+        self.count += 1
+
+    def advance(self, tilemap):
+        ## Moves and ages every projectile, then drops the ones inside a solid tile or past their lifetime.
+        ## Returns (kind, pos, direction) for each tile hit so the caller can play its effects
+        n = self.count
+        self.pos[:n] += self.vel[:n]
+        self.age[:n] += 1
+        solid = tilemap.solid_points(self.pos[:n, 0], self.pos[:n, 1])
+        expired = self.age[:n] > LIFETIMES[self.kind[:n]]
+        hits = [(int(self.kind[i]), self.pos[i].tolist(), float(self.vel[i, 0])) for i in np.flatnonzero(solid)]
+        self.keep(~(solid | expired))
+        return hits
+
+    def inside(self, rect, owner):
+        ## Indices of owner's projectiles whose point lies in rect, in firing order
+        n = self.count
+        x = self.pos[:n, 0]
+        y = self.pos[:n, 1]
+        return np.flatnonzero((self.owner[:n] == owner) & (x >= rect.left) & (x < rect.right) & (y >= rect.top) & (y < rect.bottom))
+
+    def of_kind(self, kind):
+        return np.flatnonzero(self.kind[:self.count] == kind)
+
+    def remove(self, indices):
+        if len(indices):
+            keep = np.ones(self.count, dtype=bool)
+            keep[indices] = False
+            self.keep(keep)
+
+    def keep(self, mask):
+        ## Compacts the rows flagged in mask to the front, preserving their order
+        kept = int(np.count_nonzero(mask))
+        if kept == self.count:
+            return
+        n = self.count
+        for array in (self.pos, self.vel, self.age, self.owner, self.kind):
+            array[:kept] = array[:n][mask]
+        self.count = kept
+
+    def render(self, surf, offset=(0, 0), alpha=1):
+        ## One blits call for every drawn projectile, each pulled back along its path to where it was alpha into the step
+        n = self.count
+        x = self.pos[:n, 0] - self.vel[:n, 0] * (1 - alpha) - offset[0]
+        y = self.pos[:n, 1] - self.vel[:n, 1] * (1 - alpha) - offset[1]
+        right = self.vel[:n, 0] > 0
+        blit_sequence = []
+        for kind, images in enumerate(self.images):
+            if images is None:
+                continue
+            for facing, img in enumerate(images):
+                rows = np.flatnonzero((self.kind[:n] == kind) & (right == facing))
+                if len(rows):
+                    xs = (x[rows] - img.get_width() / 2).tolist()
+                    ys = (y[rows] - img.get_height() / 2).tolist()
+                    blit_sequence.extend((img, pos) for pos in zip(xs, ys))
+        surf.blits(blit_sequence, doreturn=False)
@@ -0,0 +1,98 @@
+## Handles pack a slot index in the low bits and the slot's generation above it
+SLOT_BITS = 20
+SLOT_MASK = (1 << SLOT_BITS) - 1
+
+
+class EntityRegistry:
+    ## Every entity of a level, packed into one list per type (entity.type) and reachable through generational handles.
+    ## A handle goes stale once its entity is removed, even if the slot is reused for a new one
+    def __init__(self, types):
+        self.types = types
+        self.dense = {entity_type: [] for entity_type in types}
+        self.dense_slots = {entity_type: [] for entity_type in types}
+
+        ## Per slot: its current generation and where its entity sits in the dense lists
+        self.generations = []
+        self.locations = []
+        self.free_slots = []
+
+    def __len__(self):
+        return sum(len(entities) for entities in self.dense.values())
+
+    def __iter__(self):
+        for entity_type in self.types:
+            yield from self.dense[entity_type]
+
+    def clear(self):
+        ## Slots keep their generations, so handles taken before the clear stay stale after it
+        for entity_type in self.types:
+            for entity in self.dense[entity_type]:
+                entity.handle = None
+            self.dense[entity_type] = []
+            self.dense_slots[entity_type] = []
+        for slot, location in enumerate(self.locations):
+            if location is not None:
+                self.locations[slot] = None
+                self.generations[slot] += 1
+        self.free_slots = list(range(len(self.generations) - 1, -1, -1))
+
+    def add(self, entity):
+        if self.free_slots:
+            slot = self.free_slots.pop()
+        else:
+            slot = len(self.generations)
+            self.generations.append(0)
+            self.locations.append(None)
+        entities = self.dense[entity.type]
+        self.locations[slot] = (entity.type, len(entities))
+        entities.append(entity)
+        self.dense_slots[entity.type].append(slot)
+        entity.handle = (self.generations[slot] << SLOT_BITS) | slot
+        return entity.handle
+
+    def get(self, handle):
+        slot = handle & SLOT_MASK
+        if slot < len(self.generations) and self.generations[slot] == handle >> SLOT_BITS and self.locations[slot]:
+            entity_type, index = self.locations[slot]
+            return self.dense[entity_type][index]
+
+    def resolve(self, handles):
+        ## Entities behind the handles that are still live, skipping any removed since the handles were taken
+        for handle in handles:
+            entity = self.get(handle)
+            if entity is not None:
+                yield entity
+
+    def remove(self, entity):
+        ## Swaps the last entity of the same type into the gap, so nothing after it has to shift
+        slot = entity.handle & SLOT_MASK
+        entity_type, index = self.locations[slot]
+        entities = self.dense[entity_type]
+        slots = self.dense_slots[entity_type]
+        last = entities.pop()
+        last_slot = slots.pop()
+        if last is not entity:
+            entities[index] = last
+            slots[index] = last_slot
+            self.locations[last_slot] = (entity_type, index)
+        self.locations[slot] = None
+        self.generations[slot] += 1
+        self.free_slots.append(slot)
+        entity.handle = None
+
+    def of_type(self, entity_type):
+        ## The live list itself, for reading only
+        return self.dense[entity_type]
+
+    def count(self, *types):
+        return sum(len(self.dense[entity_type]) for entity_type in types)
+
+    def each(self, entity_type):
+        ## Safe against removing the entity just yielded: the entity swapped into its place is visited next
+        entities = self.dense[entity_type]
+        i = 0
+        while i < len(entities):
+            entity = entities[i]
+            yield entity
+            if i < len(entities) and entities[i] is entity:
+                i += 1
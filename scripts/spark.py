@@ -1,25 +1,61 @@
 import math
+import numpy as np
 import pygame
 
-class Spark:
-    def __init__(self, pos, angle, speed):
-        self.pos = list(pos)
-        self.angle = angle
-        self.speed = speed
+
+class SparkSystem:
+    ## Every live spark as rows of arrays, with the cos/sin of its fixed angle worked out once when it is emitted
+    def __init__(self, capacity=256):
+        self.count = 0
+        self.pos = np.zeros((capacity, 2))
+        self.direction = np.zeros((capacity, 2))
+        self.speed = np.zeros(capacity)
+
+    def __len__(self):
+        return self.count
+
+    def clear(self):
+        self.count = 0
+
+    def emit(self, pos, angle, speed):
+        if self.count == len(self.speed):
+            capacity = len(self.speed) * 2
+            self.pos = np.resize(self.pos, (capacity, 2))
+            self.direction = np.resize(self.direction, (capacity, 2))
+            self.speed = np.resize(self.speed, capacity)
+        i = self.count
+        self.pos[i] = (pos[0], pos[1])
+        self.direction[i] = (math.cos(angle), math.sin(angle))
+        self.speed[i] = speed
+        self.count += 1
 
     def update(self):
-        self.pos[0] += math.cos(self.angle) * self.speed
-        self.pos[1] += math.sin(self.angle) * self.speed
+        n = self.count
+        self.pos[:n] += self.direction[:n] * self.speed[:n, None]
+        self.speed[:n] = np.maximum(0, self.speed[:n] - 0.1)
+
+        ## A spark is gone as soon as it stops
+        keep = self.speed[:n] > 0
+        kept = int(np.count_nonzero(keep))
+        if kept != n:
+            for array in (self.pos, self.direction, self.speed):
+                array[:kept] = array[:n][keep]
+            self.count = kept
 
-        self.speed = max(0, self.speed - 0.1)
-        return not self.speed
-    
     def render(self, surf, offset=(0, 0)):
-        render_points = [
-            (self.pos[0] + math.cos(self.angle) * self.speed * 3 - offset[0], self.pos[1] + math.sin(self.angle) * self.speed * 3 - offset[1]),
-            (self.pos[0] + math.cos(self.angle + math.pi * 0.5) * self.speed * 0.5 - offset[0], self.pos[1] + math.sin(self.angle + math.pi * 0.5) * self.speed * 0.5 - offset[1]),
-            (self.pos[0] + math.cos(self.angle + math.pi) * self.speed * 3 - offset[0], self.pos[1] + math.sin(self.angle + math.pi) * self.speed * 3 - offset[1]),
-            (self.pos[0] + math.cos(self.angle - math.pi * 0.5) * self.speed * 0.5 - offset[0], self.pos[1] + math.sin(self.angle - math.pi * 0.5) * self.speed * 0.5 - offset[1]),
-        ]
-
-        pygame.draw.polygon(surf, (255, 255, 255), render_points)
\ No newline at end of file
+        ## Diamond along the spark's direction: 3 * speed to the front and back, 0.5 * speed to either side
+        n = self.count
+        x = self.pos[:n, 0] - offset[0]
+        y = self.pos[:n, 1] - offset[1]
+        cos = self.direction[:n, 0]
+        sin = self.direction[:n, 1]
+        length = self.speed[:n] * 3
+        width = self.speed[:n] * 0.5
+        points = np.stack((
+            np.stack((x + cos * length, y + sin * length), axis=1),
+            np.stack((x - sin * width, y + cos * width), axis=1),
+            np.stack((x - cos * length, y - sin * length), axis=1),
+            np.stack((x + sin * width, y - cos * width), axis=1),
+        ), axis=1).tolist()
+        for render_points in points:
+            pygame.draw.polygon(surf, (255, 255, 255), render_points)
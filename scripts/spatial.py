@@ -0,0 +1,189 @@
+CHUNK_SHIFT = 4
+CHUNK_SIZE = 1 << CHUNK_SHIFT
+CHUNK_MASK = CHUNK_SIZE - 1
+
+
+class ChunkGrid:
+    ## Sparse grid of cells stored in fixed-size chunks keyed by integer (chunk_x, chunk_y)
+    def __init__(self):
+        self.chunks = {}
+        self.counts = {}
+
+    def __len__(self):
+        return sum(self.counts.values())
+
+    def __iter__(self):
+        for cells in self.chunks.values():
+            for cell in cells:
+                if cell is not None:
+                    yield cell
+
+    def items(self):
+        for (cx, cy), cells in self.chunks.items():
+            for i, cell in enumerate(cells):
+                if cell is not None:
+                    yield ((cx << CHUNK_SHIFT) | (i & CHUNK_MASK), (cy << CHUNK_SHIFT) | (i >> CHUNK_SHIFT)), cell
+
+    def chunk_cells(self, cx, cy):
+        ## Row-major list of the chunk's cells, None where empty
+        return self.chunks.get((cx, cy))
+
+    def chunk_items(self, cx, cy):
+        cells = self.chunks.get((cx, cy))
+        if cells is not None:
+            for i, cell in enumerate(cells):
+                if cell is not None:
+                    yield ((cx << CHUNK_SHIFT) | (i & CHUNK_MASK), (cy << CHUNK_SHIFT) | (i >> CHUNK_SHIFT)), cell
+
+    def clear(self):
+        self.chunks = {}
+        self.counts = {}
+
+    def set_chunk(self, cx, cy, cells):
+        self.chunks[(cx, cy)] = cells
+        self.counts[(cx, cy)] = CHUNK_SIZE * CHUNK_SIZE - cells.count(None)
+
+    def clear_chunk(self, cx, cy):
+        self.chunks.pop((cx, cy), None)
+        self.counts.pop((cx, cy), None)
+
+    def get(self, x, y):
+        cells = self.chunks.get((x >> CHUNK_SHIFT, y >> CHUNK_SHIFT))
+        if cells is not None:
+            return cells[((y & CHUNK_MASK) << CHUNK_SHIFT) | (x & CHUNK_MASK)]
+
+    def set(self, x, y, value):
+        key = (x >> CHUNK_SHIFT, y >> CHUNK_SHIFT)
+        cells = self.chunks.get(key)
+        if cells is None:
+            cells = [None] * (CHUNK_SIZE * CHUNK_SIZE)
+            self.chunks[key] = cells
+            self.counts[key] = 0
+        i = ((y & CHUNK_MASK) << CHUNK_SHIFT) | (x & CHUNK_MASK)
+        if cells[i] is None:
+            self.counts[key] += 1
+        cells[i] = value
+
+    def remove(self, x, y):
+        key = (x >> CHUNK_SHIFT, y >> CHUNK_SHIFT)
+        cells = self.chunks.get(key)
+        if cells is None:
+            return None
+        i = ((y & CHUNK_MASK) << CHUNK_SHIFT) | (x & CHUNK_MASK)
+        value = cells[i]
+        if value is not None:
+            cells[i] = None
+            self.counts[key] -= 1
+            if not self.counts[key]:
+                del self.chunks[key]
+                del self.counts[key]
+        return value
+
+
+class BucketIndex:
+    ## Items with a bounding rect, bucketed by every fixed-size cell the rect overlaps
+    def __init__(self, bucket_size):
+        self.bucket_size = bucket_size
+        self.buckets = {}
+        self.entries = {}
+        self.next_order = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def clear(self):
+        self.buckets = {}
+        self.entries = {}
+        self.next_order = 0
+
+    def bucket_range(self, rect):
+        size = self.bucket_size
+        for bx in range(rect.left // size, (rect.right - 1) // size + 1):
+            for by in range(rect.top // size, (rect.bottom - 1) // size + 1):
+                yield bx, by
+
+    def insert(self, item, rect, order=None):
+        ## order defaults to insertion order, callers that load items out of order can pass their own
+        if order is None:
+            order = self.next_order
+            self.next_order += 1
+        entry = (order, item, rect)
+        self.entries[id(item)] = entry
+        for bucket in self.bucket_range(rect):
+            if bucket in self.buckets:
+                self.buckets[bucket].append(entry)
+            else:
+                self.buckets[bucket] = [entry]
+
+    def remove(self, item):
+        entry = self.entries.pop(id(item), None)
+        if entry is None:
+            return None
+        for bucket in self.bucket_range(entry[2]):
+            entries = self.buckets[bucket]
+            entries.remove(entry)
+            if not entries:
+                del self.buckets[bucket]
+        return entry[2]
+
+    def rect_of(self, item):
+        entry = self.entries.get(id(item))
+        if entry is not None:
+            return entry[2]
+
+    def query_rect(self, rect):
+        ## Items overlapping rect, in insertion order
+        found = {}
+        for bucket in self.bucket_range(rect):
+            for entry in self.buckets.get(bucket, ()):
+                if entry[0] not in found and entry[2].colliderect(rect):
+                    found[entry[0]] = entry[1]
+        return [found[order] for order in sorted(found)]
+
+    def query_point(self, pos):
+        size = self.bucket_size
+        matches = []
+        for entry in self.buckets.get((int(pos[0] // size), int(pos[1] // size)), ()):
+            if entry[2].collidepoint(pos):
+                matches.append(entry)
+        matches.sort(key=lambda entry: entry[0])
+        return [entry[1] for entry in matches]
+
+
+class SpatialHash:
+    ## Uniform grid rebuilt every step: items are bucketed by each cell their rect touches and tagged with a layer bit
+    def __init__(self, cell_size):
+        self.cell_size = cell_size
+        self.cells = {}
+        self.count = 0
+
+    def clear(self):
+        self.cells = {}
+        self.count = 0
+
+    def insert(self, item, rect, layer):
+        entry = (self.count, item, rect, layer)
+        self.count += 1
+        size = self.cell_size
+        for cx in range(rect.left // size, (rect.right - 1) // size + 1):
+            for cy in range(rect.top // size, (rect.bottom - 1) // size + 1):
+                if (cx, cy) in self.cells:
+                    self.cells[(cx, cy)].append(entry)
+                else:
+                    self.cells[(cx, cy)] = [entry]
+
+    def query_point(self, pos, layers):
+        ## Items on the given layers containing pos, in insertion order
+        size = self.cell_size
+        return [entry[1] for entry in self.cells.get((int(pos[0] // size), int(pos[1] // size)), ())
+                if entry[3] & layers and entry[2].collidepoint(pos)]
+
+    def query_rect(self, rect, layers):
+        found = {}
+        size = self.cell_size
+        for cx in range(rect.left // size, (rect.right - 1) // size + 1):
+            for cy in range(rect.top // size, (rect.bottom - 1) // size + 1):
+                for entry in self.cells.get((cx, cy), ()):
+                    if entry[0] not in found and entry[3] & layers and entry[2].colliderect(rect):
+                        found[entry[0]] = entry[1]
+        return [found[order] for order in sorted(found)]
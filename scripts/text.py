@@ -0,0 +1,37 @@
+from collections import OrderedDict
+
+import pygame
+
+FONT_PATH = 'data/fonts/alagard.ttf'
+
+
+class TextCache:
+    ## Each (face, size) is opened from disk once. Rendered strings are kept by (text, size, color, face) and the least
+    ## recently drawn are dropped once they take up more than max_bytes of pixels
+    def __init__(self, max_bytes=8 * 1024 * 1024):
+        self.fonts = {}
+        self.surfaces = OrderedDict()
+        self.max_bytes = max_bytes
+        self.bytes = 0
+
+    def font(self, size, face=FONT_PATH):
+        font = self.fonts.get((face, size))
+        if font is None:
+            font = pygame.font.Font(face, size)
+            self.fonts[(face, size)] = font
+        return font
+
+    def render(self, text, size, color=(255, 255, 255), face=FONT_PATH):
+        key = (text, size, tuple(color), face)
+        surf = self.surfaces.get(key)
+        if surf is not None:
+            self.surfaces.move_to_end(key)
+            return surf
+
+        surf = self.font(size, face).render(text, True, color)
+        self.surfaces[key] = surf
+        self.bytes += surf.get_pitch() * surf.get_height()
+        while self.bytes > self.max_bytes and len(self.surfaces) > 1:
+            old_key, old_surf = self.surfaces.popitem(last=False)
+            self.bytes -= old_surf.get_pitch() * old_surf.get_height()
+        return surf
@@ -1,6 +1,12 @@
 import json
+import math
 import os
 import pygame
+import numpy as np
+from collections import OrderedDict
+
+from scripts.spatial import ChunkGrid, BucketIndex, CHUNK_SIZE, CHUNK_SHIFT, CHUNK_MASK
+from scripts.mapformat import MapFile, MAP_EXTENSION, SPAWNER_TYPE, encode_map
 
 ## AUTOTILE Rules
 AUTOTILE_MAP = {
@@ -15,7 +21,7 @@ AUTOTILE_MAP = {
     tuple(sorted([(1, 0), (-1, 0), (0, 1), (0, -1)])): 8,
 }
 
-NEIGHBOR_OFFSETS = [(-1, 0), (-1, -1), (0, -1), (1, -1), (1, 0), (0, 0), (-1, 1), (0, 1), (1, 1)]
+AUTOTILE_OFFSETS = [(1, 0), (-1, 0), (0, -1), (0, 1)]
 PHYSICS_TILES = {'grass', 'stone'}
 AUTOTILE_TYPES = {'grass', 'stone'}
 
@@ -23,55 +29,319 @@ class Tilemap:
     def __init__(self, game, tile_size=16):
         self.game = game
         self.tile_size = tile_size
-        self.tilemap = {}
+        self.grid = ChunkGrid()
         self.offgrid_tiles = []
+        self.offgrid_index = BucketIndex(CHUNK_SIZE * tile_size)
+
+        ## Pre-rendered static geometry, one surface per grid chunk (None for empty chunks)
+        self.chunk_surfaces = {}
+
+        ## Cells whose autotile variant may be stale since the last autotile pass
+        self.autotile_dirty = set()
+
+        ## Solid tiles merged into rects per chunk, each solid cell points at the rect covering it
+        self.collision_grid = ChunkGrid()
+        self.collision_dirty = set()
+        ## Tile span (x0, y0, x1, y1) -> merged rects over it, for physics_rects_in
+        self.physics_rects_cache = {}
+        self.solid_masks = {}
+
+        ## (type, variant) -> {key: (sequence, tile)}, keyed by location for grid tiles and id for offgrid tiles
+        self.grid_type_index = {}
+        self.offgrid_type_index = {}
+        self.index_sequence = 0
+
+        ## Streaming mode: the open map file, and the resident chunks (with their offgrid tiles) in least recently used order
+        self.map_file = None
+        self.chunk_index = {}
+        self.chunk_collisions = None
+        self.resident_chunks = OrderedDict()
+        self.max_resident_chunks = 0
+        self.stream_skip = set()
+
+    def get_tile(self, tile_pos):
+        if self.map_file is not None:
+            self.fault_chunk((tile_pos[0] >> CHUNK_SHIFT, tile_pos[1] >> CHUNK_SHIFT))
+        return self.grid.get(tile_pos[0], tile_pos[1])
+
+    def set_tile(self, tile_pos, tile_type, variant):
+        old_tile = self.grid.get(tile_pos[0], tile_pos[1])
+        if old_tile is not None:
+            if old_tile['type'] == tile_type and old_tile['variant'] == variant:
+                return
+            self.invalidate_tile(old_tile)
+            self.unindex_tile((tile_pos[0], tile_pos[1]), old_tile)
+        tile = {'type': tile_type, 'variant': variant, 'pos': [tile_pos[0], tile_pos[1]]}
+        self.grid.set(tile_pos[0], tile_pos[1], tile)
+        self.index_tile((tile_pos[0], tile_pos[1]), tile)
+        self.invalidate_tile(tile)
+        self.mark_autotile_dirty(tile_pos)
+        if tile_type in PHYSICS_TILES or (old_tile is not None and old_tile['type'] in PHYSICS_TILES):
+            self.mark_collision_dirty(tile_pos)
+
+    def remove_tile(self, tile_pos):
+        tile = self.grid.remove(tile_pos[0], tile_pos[1])
+        if tile is not None:
+            self.unindex_tile((tile_pos[0], tile_pos[1]), tile)
+            self.invalidate_tile(tile)
+            self.mark_autotile_dirty(tile_pos)
+            if tile['type'] in PHYSICS_TILES:
+                self.mark_collision_dirty(tile_pos)
+        return tile
+
+    def index_tile(self, location, tile, index=None, sequence=None):
+        if index is None:
+            index = self.grid_type_index
+        if sequence is None:
+            sequence = self.index_sequence
+            self.index_sequence += 1
+        pair = (tile['type'], tile['variant'])
+        if pair not in index:
+            index[pair] = {}
+        index[pair][location] = (sequence, tile)
+
+    def unindex_tile(self, location, tile, index=None):
+        if index is None:
+            index = self.grid_type_index
+        return index[(tile['type'], tile['variant'])].pop(location)[0]
+
+    def set_variant(self, location, tile, variant):
+        sequence = self.unindex_tile(location, tile)
+        tile['variant'] = variant
+        self.index_tile(location, tile, sequence=sequence)
+
+    def mark_autotile_dirty(self, tile_pos):
+        self.autotile_dirty.add((tile_pos[0], tile_pos[1]))
+        for shift in AUTOTILE_OFFSETS:
+            self.autotile_dirty.add((tile_pos[0] + shift[0], tile_pos[1] + shift[1]))
+
+    def mark_collision_dirty(self, tile_pos):
+        self.collision_dirty.add((tile_pos[0] >> CHUNK_SHIFT, tile_pos[1] >> CHUNK_SHIFT))
+
+    def add_offgrid_tile(self, tile):
+        self.offgrid_tiles.append(tile)
+        self.index_tile(id(tile), tile, index=self.offgrid_type_index)
+        rect = self.offgrid_rect(tile)
+        self.offgrid_index.insert(tile, rect)
+        self.invalidate_area(rect.x, rect.y, rect.width, rect.height)
+
+    def remove_offgrid_tile(self, tile):
+        for i, other in enumerate(self.offgrid_tiles):
+            if other is tile:
+                del self.offgrid_tiles[i]
+                break
+        self.unindex_tile(id(tile), tile, index=self.offgrid_type_index)
+        rect = self.offgrid_index.remove(tile)
+        if rect is not None:
+            self.invalidate_area(rect.x, rect.y, rect.width, rect.height)
+
+    def offgrid_at(self, pos):
+        return self.offgrid_index.query_point(pos)
+
+    def offgrid_in(self, rect):
+        return self.offgrid_index.query_rect(rect)
+
+    def index_tiles(self):
+        self.grid_type_index = {}
+        self.offgrid_type_index = {}
+        self.index_sequence = 0
+        self.offgrid_index = BucketIndex(CHUNK_SIZE * self.tile_size)
+        for tile in self.offgrid_tiles:
+            self.index_tile(id(tile), tile, index=self.offgrid_type_index)
+            self.offgrid_index.insert(tile, self.offgrid_rect(tile))
+
+    def tile_image(self, tile):
+        return self.game.assets[tile['type']][tile['variant']]
+
+    def offgrid_rect(self, tile):
+        ## The game never loads spawner images, those only need a tile sized box
+        if tile['type'] in self.game.assets:
+            size = self.tile_image(tile).get_size()
+        else:
+            size = (self.tile_size, self.tile_size)
+        return pygame.Rect(math.floor(tile['pos'][0]), math.floor(tile['pos'][1]), size[0], size[1])
+
+    def invalidate_tile(self, tile):
+        if tile['type'] in self.game.assets:
+            size = self.tile_image(tile).get_size()
+        else:
+            size = (self.tile_size, self.tile_size)
+        self.invalidate_area(tile['pos'][0] * self.tile_size, tile['pos'][1] * self.tile_size, size[0], size[1])
+
+    def invalidate_area(self, x, y, width, height):
+        chunk_px = CHUNK_SIZE * self.tile_size
+        for cx in range(int(x // chunk_px), int((x + width) // chunk_px) + 1):
+            for cy in range(int(y // chunk_px), int((y + height) // chunk_px) + 1):
+                self.chunk_surfaces.pop((cx, cy), None)
 
     def extract(self, id_pairs, keep=False):
+        if self.map_file is not None:
+            return self.extract_streamed(id_pairs, keep)
+
+        ## Walks the (type, variant) index, so the cost follows the number of matches instead of the map size
+        offgrid_entries = []
+        grid_entries = []
+        for pair in id_pairs:
+            offgrid_entries += self.offgrid_type_index.get(pair, {}).values()
+            grid_entries += self.grid_type_index.get(pair, {}).items()
+        offgrid_entries.sort(key=lambda entry: entry[0])
+        grid_entries.sort(key=lambda entry: entry[1][0])
+
         matches = []
-        for tile in self.offgrid_tiles.copy():
-            if (tile['type'], tile['variant']) in id_pairs:
-                matches.append(tile.copy())
-                if not keep:
-                    self.offgrid_tiles.remove(tile)
-
-        locations_to_delete = []
-        for location in self.tilemap:
-            tile = self.tilemap[location]
-            if (tile['type'], tile['variant']) in id_pairs:
-                matches.append(tile.copy())
-                matches[-1]['pos'] = matches[-1]['pos'].copy()
-                matches[-1]['pos'][0] *= self.tile_size
-                matches[-1]['pos'][1] *= self.tile_size
-                if not keep:
-                    locations_to_delete.append(location)
-
-        for location in locations_to_delete:
-            del self.tilemap[location]
+        for sequence, tile in offgrid_entries:
+            matches.append(tile.copy())
+
+        for location, (sequence, tile) in grid_entries:
+            matches.append(tile.copy())
+            matches[-1]['pos'] = matches[-1]['pos'].copy()
+            matches[-1]['pos'][0] *= self.tile_size
+            matches[-1]['pos'][1] *= self.tile_size
+
+        if not keep:
+            if offgrid_entries:
+                extracted = {id(tile) for sequence, tile in offgrid_entries}
+                self.offgrid_tiles = [tile for tile in self.offgrid_tiles if id(tile) not in extracted]
+                for sequence, tile in offgrid_entries:
+                    self.unindex_tile(id(tile), tile, index=self.offgrid_type_index)
+                    self.offgrid_index.remove(tile)
+            for location, (sequence, tile) in grid_entries:
+                self.grid.remove(location[0], location[1])
+                self.unindex_tile(location, tile)
+                if tile['type'] in PHYSICS_TILES:
+                    self.mark_collision_dirty(location)
+            self.chunk_surfaces = {}
 
         return matches
 
-    def tiles_around(self, pos):
-        tiles = []
-        tile_location = (int(pos[0] // self.tile_size), int(pos[1] // self.tile_size))
-        for offset in NEIGHBOR_OFFSETS:
-            check_location = str(tile_location[0] + offset[0]) + ';' + str(tile_location[1] + offset[1])
-            if check_location in self.tilemap:
-                tiles.append(self.tilemap[check_location])
-        return tiles
-    
-    def has_tiles_above(self, pos):
-        tile_x = int(pos[0] // self.tile_size)
-        tile_y = int(pos[1] // self.tile_size) - 1
-        tile_location = f'{tile_x};{tile_y}'
+    def extract_streamed(self, id_pairs, keep):
+        ## A streamed map is never fully resident, so scan the file in the same order a full load would index it
+        pairs = set(id_pairs)
+        matches = []
+        for tile in self.map_file.offgrid_tiles():
+            if (tile['type'], tile['variant']) in pairs:
+                matches.append(tile)
+        ## Grid spawners live in their own table, only other types need the dense layer scanned
+        if any(pair[0] != SPAWNER_TYPE for pair in pairs):
+            for x, y, tile_type, variant in self.map_file.tiles():
+                if (tile_type, variant) in pairs:
+                    matches.append({'type': tile_type, 'variant': variant, 'pos': [x * self.tile_size, y * self.tile_size]})
+        for index, tile in self.map_file.spawners():
+            if index is None and (tile['type'], tile['variant']) in pairs:
+                tile['pos'] = [tile['pos'][0] * self.tile_size, tile['pos'][1] * self.tile_size]
+                matches.append(tile)
+
+        if not keep:
+            ## The file stays untouched, extracted tiles are skipped whenever a chunk is loaded
+            self.stream_skip |= pairs
+            while self.resident_chunks:
+                self.evict_chunk(*self.resident_chunks.popitem())
+
+        return matches
+
+    def stream(self, path, max_chunks=64):
+        ## Keeps the binary map open and only holds chunks near the camera or a physics query in memory
+        map_file = MapFile.open(path)
+        self.map_file = map_file
+        self.tile_size = map_file.tile_size
+        self.chunk_index = map_file.chunk_index()
+        self.chunk_collisions = map_file.collision_runs()
+        self.resident_chunks = OrderedDict()
+        self.max_resident_chunks = max_chunks
+        self.stream_skip = set()
 
-        if tile_location in self.tilemap and self.tilemap[tile_location]['type'] in PHYSICS_TILES:
+        self.offgrid_tiles = []
+        self.index_tiles()
+        self.grid.clear()
+        self.collision_grid.clear()
+        self.collision_dirty = set()
+        self.physics_rects_cache = {}
+        self.solid_masks = {}
+        self.chunk_surfaces = {}
+        self.autotile_dirty.clear()
+
+    def stop_streaming(self):
+        self.map_file = None
+        self.chunk_index = {}
+        self.chunk_collisions = None
+        self.resident_chunks = OrderedDict()
+        self.stream_skip = set()
+
+    def fault_chunk(self, chunk):
+        if chunk in self.resident_chunks:
+            self.resident_chunks.move_to_end(chunk)
+            return
+        self.resident_chunks[chunk] = self.load_chunk(chunk)
+        while len(self.resident_chunks) > self.max_resident_chunks:
+            self.evict_chunk(*self.resident_chunks.popitem(last=False))
+
+    def fault_tiles(self, x0, y0, x1, y1):
+        for cx in range(x0 >> CHUNK_SHIFT, (x1 >> CHUNK_SHIFT) + 1):
+            for cy in range(y0 >> CHUNK_SHIFT, (y1 >> CHUNK_SHIFT) + 1):
+                self.fault_chunk((cx, cy))
+
+    def stream_around(self, rect):
+        ## Loads the chunks under rect plus a one chunk margin, so they are resident before they scroll into view
+        chunk_px = CHUNK_SIZE * self.tile_size
+        for chunk in self.chunks_in(rect.inflate(chunk_px * 2, chunk_px * 2)):
+            self.fault_chunk(chunk)
+        ## Touch the visible chunks last so the margin is evicted before them
+        for chunk in self.chunks_in(rect):
+            self.fault_chunk(chunk)
+
+    def load_chunk(self, chunk):
+        offgrid = []
+        if chunk not in self.chunk_index:
+            return offgrid
+
+        cells = [None] * (CHUNK_SIZE * CHUNK_SIZE)
+        for x, y, tile_type, variant in self.map_file.chunk_tiles(chunk[0], chunk[1]):
+            if (tile_type, variant) not in self.stream_skip:
+                cells[((y & CHUNK_MASK) << CHUNK_SHIFT) | (x & CHUNK_MASK)] = {'type': tile_type, 'variant': variant, 'pos': [x, y]}
+        if cells.count(None) != len(cells):
+            self.grid.set_chunk(chunk[0], chunk[1], cells)
+            self.physics_rects_cache = {}
+            if self.chunk_collisions is None:
+                self.merge_chunk_collisions(chunk)
+            elif chunk in self.chunk_collisions:
+                self.set_chunk_collisions(chunk, self.chunk_collisions[chunk])
+
+        for i in self.chunk_index[chunk]:
+            tile = self.map_file.offgrid_entry(i)
+            if (tile['type'], tile['variant']) not in self.stream_skip:
+                ## Ordered by file position so overlapping decor draws the same however the chunks were loaded
+                self.offgrid_index.insert(tile, self.offgrid_rect(tile), order=i)
+                offgrid.append(tile)
+        return offgrid
+
+    def evict_chunk(self, chunk, offgrid):
+        self.grid.clear_chunk(chunk[0], chunk[1])
+        self.collision_grid.clear_chunk(chunk[0], chunk[1])
+        self.physics_rects_cache = {}
+        self.solid_masks.pop(chunk, None)
+        for tile in offgrid:
+            self.offgrid_index.remove(tile)
+        self.chunk_surfaces.pop(chunk, None)
+
+    def has_tiles_above(self, pos):
+        if self.map_file is not None:
+            self.fault_chunk((int(pos[0] // self.tile_size) >> CHUNK_SHIFT, (int(pos[1] // self.tile_size) - 1) >> CHUNK_SHIFT))
+        tile = self.grid.get(int(pos[0] // self.tile_size), int(pos[1] // self.tile_size) - 1)
+        if tile is not None and tile['type'] in PHYSICS_TILES:
             return True
         return False
 
+    def json_tilemap(self):
+        return {str(location[0]) + ';' + str(location[1]): tile for location, tile in self.grid.items()}
+
     ## Original save method
     def save(self, path):
-        f = open(path, 'w')
-        json.dump({'tilemap': self.tilemap, 'tile_size': self.tile_size, 'offgrid': self.offgrid_tiles}, f)
+        map_data = {'tilemap': self.json_tilemap(), 'tile_size': self.tile_size, 'offgrid': self.offgrid_tiles}
+        if path.endswith(MAP_EXTENSION):
+            f = open(path, 'wb')
+            f.write(encode_map(map_data))
+        else:
+            f = open(path, 'w')
+            json.dump(map_data, f)
         f.close()
         print('map saved')
 
@@ -81,57 +351,255 @@ class Tilemap:
     ##    os.makedirs(directory, exist_ok=True)  # Ensure the directory exists
     ##    try:
     ##        with open(path, 'w') as f:
-    ##            json.dump({'tilemap': self.tilemap, 'tile_size': self.tile_size, 'offgrid': self.offgrid_tiles}, f)
+    ##            json.dump({'tilemap': self.json_tilemap(), 'tile_size': self.tile_size, 'offgrid': self.offgrid_tiles}, f)
     ##        print('Map saved to:', path)
     ##    except IOError as e:
     ##        print('Failed to save map:', e)
 
     def load(self, path):
+        self.stop_streaming()
+        if path.endswith(MAP_EXTENSION):
+            self.load_binary(path)
+            return
+
         f = open(path, 'r')
         map_data = json.load(f)
         f.close()
 
-        self.tilemap = map_data['tilemap']
         self.tile_size = map_data['tile_size']
         self.offgrid_tiles = map_data['offgrid']
+        self.index_tiles()
+        self.grid.clear()
+        for tile in map_data['tilemap'].values():
+            self.grid.set(tile['pos'][0], tile['pos'][1], tile)
+            self.index_tile((tile['pos'][0], tile['pos'][1]), tile)
+        self.chunk_surfaces = {}
+        self.autotile_dirty.clear()
+        self.merge_collisions()
+
+    def load_binary(self, path):
+        map_file = MapFile.open(path)
+
+        self.tile_size = map_file.tile_size
+        self.offgrid_tiles = map_file.offgrid_tiles()
+        self.index_tiles()
+        self.grid.clear()
+        for x, y, tile_type, variant in map_file.tiles():
+            tile = {'type': tile_type, 'variant': variant, 'pos': [x, y]}
+            self.grid.set(x, y, tile)
+            self.index_tile((x, y), tile)
+        for index, tile in map_file.spawners():
+            if index is None:
+                self.grid.set(tile['pos'][0], tile['pos'][1], tile)
+                self.index_tile((tile['pos'][0], tile['pos'][1]), tile)
+        self.chunk_surfaces = {}
+        self.autotile_dirty.clear()
+
+        ## Compiled bundles carry the merged collision rects, so they only need copying in
+        collision_runs = map_file.collision_runs()
+        if collision_runs is None:
+            self.merge_collisions()
+        else:
+            self.collision_grid.clear()
+            self.solid_masks = {}
+            for chunk, merged in collision_runs.items():
+                self.set_chunk_collisions(chunk, merged)
+            self.collision_dirty = set()
+            self.physics_rects_cache = {}
 
     def solid_check(self, pos):
-        tile_location = str(int(pos[0] // self.tile_size)) + ';' + str(int(pos[1] // self.tile_size))
-        if tile_location in self.tilemap:
-            if self.tilemap[tile_location]['type'] in PHYSICS_TILES:
-                return self.tilemap[tile_location]
-
-    def physics_rects_around(self, pos):
-        rects = []
-        for tile in self.tiles_around(pos):
-            if tile['type'] in PHYSICS_TILES:
-                rects.append(
-                    pygame.Rect(tile['pos'][0] * self.tile_size, tile['pos'][1] * self.tile_size, self.tile_size,
-                                self.tile_size))
+        if self.map_file is not None:
+            self.fault_chunk((int(pos[0] // self.tile_size) >> CHUNK_SHIFT, int(pos[1] // self.tile_size) >> CHUNK_SHIFT))
+        tile = self.grid.get(int(pos[0] // self.tile_size), int(pos[1] // self.tile_size))
+        if tile is not None and tile['type'] in PHYSICS_TILES:
+            return tile
+
+    def solid_points(self, xs, ys):
+        ## Batched solid_check: a bool array saying which of the points (xs[i], ys[i]) are inside a solid tile
+        if self.collision_dirty:
+            self.update_collisions()
+        tile_x = np.floor_divide(xs, self.tile_size).astype(np.int64)
+        tile_y = np.floor_divide(ys, self.tile_size).astype(np.int64)
+        solid = np.zeros(len(tile_x), dtype=bool)
+        if not len(tile_x):
+            return solid
+        chunks, inverse = np.unique(np.stack((tile_x >> CHUNK_SHIFT, tile_y >> CHUNK_SHIFT), axis=1), axis=0, return_inverse=True)
+        inverse = inverse.reshape(-1)
+        for i, chunk in enumerate(chunks.tolist()):
+            chunk = tuple(chunk)
+            if self.map_file is not None:
+                self.fault_chunk(chunk)
+            mask = self.solid_mask(chunk)
+            if mask is not None:
+                rows = inverse == i
+                solid[rows] = mask[tile_y[rows] & CHUNK_MASK, tile_x[rows] & CHUNK_MASK]
+        return solid
+
+    def solid_mask(self, chunk):
+        ## The chunk's solid cells as a CHUNK_SIZE x CHUNK_SIZE bool array indexed [y, x], None when it has none
+        if chunk in self.solid_masks:
+            return self.solid_masks[chunk]
+        cells = self.collision_grid.chunk_cells(chunk[0], chunk[1])
+        mask = None
+        if cells is not None:
+            mask = np.array([cell is not None for cell in cells]).reshape(CHUNK_SIZE, CHUNK_SIZE)
+        self.solid_masks[chunk] = mask
+        return mask
+
+    def merge_collisions(self):
+        self.collision_grid.clear()
+        self.solid_masks = {}
+        self.collision_dirty = set(self.grid.chunks)
+        self.update_collisions()
+
+    def update_collisions(self):
+        for chunk in self.collision_dirty:
+            self.merge_chunk_collisions(chunk)
+        self.collision_dirty.clear()
+        self.physics_rects_cache = {}
+
+    def merge_chunk_collisions(self, chunk):
+        ## Greedy merge: runs of solid cells along each row, then identical runs in consecutive rows
+        self.collision_grid.clear_chunk(chunk[0], chunk[1])
+        self.solid_masks.pop(chunk, None)
+        tiles = self.grid.chunk_cells(chunk[0], chunk[1])
+        if tiles is None:
+            return
+        solid = [tile is not None and tile['type'] in PHYSICS_TILES for tile in tiles]
+        if not any(solid):
+            return
+
+        merged = []
+        open_runs = {}
+        for row in range(CHUNK_SIZE + 1):
+            row_runs = {}
+            if row < CHUNK_SIZE:
+                i = row * CHUNK_SIZE
+                column = 0
+                while column < CHUNK_SIZE:
+                    if solid[i + column]:
+                        start = column
+                        while column < CHUNK_SIZE and solid[i + column]:
+                            column += 1
+                        row_runs[(start, column)] = open_runs.pop((start, column), row)
+                    else:
+                        column += 1
+            for run, start_row in open_runs.items():
+                merged.append((run[0], start_row, run[1], row))
+            open_runs = row_runs
+        self.set_chunk_collisions(chunk, merged)
+
+    def set_chunk_collisions(self, chunk, merged):
+        ## merged holds (x0, y0, x1, y1) cell bounds inside the chunk
+        cells = [None] * (CHUNK_SIZE * CHUNK_SIZE)
+        base_x = chunk[0] * CHUNK_SIZE * self.tile_size
+        base_y = chunk[1] * CHUNK_SIZE * self.tile_size
+        for x0, y0, x1, y1 in merged:
+            rect = pygame.Rect(base_x + x0 * self.tile_size, base_y + y0 * self.tile_size, (x1 - x0) * self.tile_size, (y1 - y0) * self.tile_size)
+            for row in range(y0, y1):
+                cells[row * CHUNK_SIZE + x0:row * CHUNK_SIZE + x1] = [rect] * (x1 - x0)
+        self.collision_grid.set_chunk(chunk[0], chunk[1], cells)
+        self.solid_masks.pop(chunk, None)
+
+    def physics_rects_in(self, rect):
+        ## Unclipped merged rects overlapping rect, each once, used to sweep movement across several tiles.
+        ## Cached per tile span and shared between callers, so entities moving within the same tiles reuse the list
+        if self.collision_dirty:
+            self.update_collisions()
+        x0 = rect.left // self.tile_size
+        y0 = rect.top // self.tile_size
+        x1 = (rect.right - 1) // self.tile_size
+        y1 = (rect.bottom - 1) // self.tile_size
+        if self.map_file is not None:
+            self.fault_tiles(x0, y0, x1, y1)
+        rects = self.physics_rects_cache.get((x0, y0, x1, y1))
+        if rects is None:
+            rects = []
+            for y in range(y0, y1 + 1):
+                for x in range(x0, x1 + 1):
+                    merged = self.collision_grid.get(x, y)
+                    if merged is not None and merged not in rects:
+                        rects.append(merged)
+            if len(self.physics_rects_cache) > 4096:
+                self.physics_rects_cache = {}
+            self.physics_rects_cache[(x0, y0, x1, y1)] = rects
         return rects
 
+    ## Whole-map pass, kept as the batch fallback for autotile_changed
     def autotile(self):
-        for location in self.tilemap:
-            tile = self.tilemap[location]
-            neighbors = set()
-            for shift in [(1, 0), (-1, 0), (0, -1), (0, 1)]:
-                check_location = str(tile['pos'][0] + shift[0]) + ';' + str(tile['pos'][1] + shift[1])
-                if check_location in self.tilemap:
-                    if self.tilemap[check_location]['type'] == tile['type']:
-                        neighbors.add(shift)
-            neighbors = tuple(sorted(neighbors))
-            if (tile['type'] in AUTOTILE_TYPES) and (neighbors in AUTOTILE_MAP):
-                tile['variant'] = AUTOTILE_MAP[neighbors]
+        for location, tile in self.grid.items():
+            self.autotile_cell(location, tile)
+        self.autotile_dirty.clear()
+
+    ## Only recomputes cells touched by set_tile/remove_tile since the last pass
+    def autotile_changed(self):
+        for location in self.autotile_dirty:
+            tile = self.grid.get(location[0], location[1])
+            if tile is not None:
+                self.autotile_cell(location, tile)
+        self.autotile_dirty.clear()
+
+    def autotile_cell(self, location, tile):
+        if tile['type'] not in AUTOTILE_TYPES:
+            return
+        neighbors = set()
+        for shift in AUTOTILE_OFFSETS:
+            neighbor = self.grid.get(location[0] + shift[0], location[1] + shift[1])
+            if neighbor is not None and neighbor['type'] == tile['type']:
+                neighbors.add(shift)
+        neighbors = tuple(sorted(neighbors))
+        if neighbors in AUTOTILE_MAP and tile['variant'] != AUTOTILE_MAP[neighbors]:
+            self.set_variant(location, tile, AUTOTILE_MAP[neighbors])
+            self.invalidate_tile(tile)
+
+    def bake_chunk(self, chunk):
+        chunk_px = CHUNK_SIZE * self.tile_size
+        origin = (chunk[0] * chunk_px, chunk[1] * chunk_px)
+        if self.map_file is not None:
+            self.fault_tiles((chunk[0] - 1) << CHUNK_SHIFT, (chunk[1] - 1) << CHUNK_SHIFT, chunk[0] << CHUNK_SHIFT, chunk[1] << CHUNK_SHIFT)
+
+        blits = []
+        for tile in self.offgrid_in(pygame.Rect(origin, (chunk_px, chunk_px))):
+            blits.append((self.tile_image(tile), (math.floor(tile['pos'][0]) - origin[0], math.floor(tile['pos'][1]) - origin[1])))
+
+        ## Oversized tiles from the chunks above and to the left can hang over into this one
+        grid_blits = []
+        for cx, cy in [(chunk[0] - 1, chunk[1] - 1), (chunk[0], chunk[1] - 1), (chunk[0] - 1, chunk[1]), chunk]:
+            for location, tile in self.grid.chunk_items(cx, cy):
+                img = self.tile_image(tile)
+                pos = (location[0] * self.tile_size - origin[0], location[1] * self.tile_size - origin[1])
+                if -img.get_width() < pos[0] < chunk_px and -img.get_height() < pos[1] < chunk_px:
+                    grid_blits.append((location, img, pos))
+        grid_blits.sort(key=lambda blit: blit[0])
+        blits += [(img, pos) for location, img, pos in grid_blits]
+
+        if not blits:
+            self.chunk_surfaces[chunk] = None
+            return None
+
+        chunk_surf = pygame.Surface((chunk_px, chunk_px))
+        chunk_surf.set_colorkey((0, 0, 0))
+        chunk_surf.blits(blits, doreturn=False)
+        self.chunk_surfaces[chunk] = chunk_surf
+        return chunk_surf
+
+    def chunks_in(self, rect):
+        chunk_px = CHUNK_SIZE * self.tile_size
+        chunks = []
+        for cx in range(rect.left // chunk_px, rect.right // chunk_px + 1):
+            for cy in range(rect.top // chunk_px, rect.bottom // chunk_px + 1):
+                chunks.append((cx, cy))
+        return chunks
 
     def render(self, surf, offset=(0, 0)):
-        for tile in self.offgrid_tiles:
-            surf.blit(self.game.assets[tile['type']][tile['variant']],
-                      (tile['pos'][0] - offset[0], tile['pos'][1] - offset[1]))
-
-        for x in range(offset[0] // self.tile_size, (offset[0] + surf.get_width()) // self.tile_size + 1):
-            for y in range(offset[1] // self.tile_size, (offset[1] + surf.get_height()) // self.tile_size + 1):
-                location = str(x) + ';' + str(y)
-                if location in self.tilemap:
-                    tile = self.tilemap[location]
-                    surf.blit(self.game.assets[tile['type']][tile['variant']], (
-                        tile['pos'][0] * self.tile_size - offset[0], tile['pos'][1] * self.tile_size - offset[1]))
\ No newline at end of file
+        chunk_px = CHUNK_SIZE * self.tile_size
+        view = pygame.Rect(offset[0], offset[1], surf.get_width(), surf.get_height())
+        if self.map_file is not None:
+            self.stream_around(view)
+        for cx, cy in self.chunks_in(view):
+            if (cx, cy) in self.chunk_surfaces:
+                chunk_surf = self.chunk_surfaces[(cx, cy)]
+            else:
+                chunk_surf = self.bake_chunk((cx, cy))
+            if chunk_surf is not None:
+                surf.blit(chunk_surf, (cx * chunk_px - offset[0], cy * chunk_px - offset[1]))
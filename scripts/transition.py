@@ -0,0 +1,44 @@
+import numpy as np
+import pygame
+
+
+class IrisWipe:
+    ## Blacks out everything outside a circle in the middle of the surface. The rects covering the outside are worked
+    ## out once per (surface size, radius), from pygame.draw.circle itself so the edge matches it pixel for pixel,
+    ## and drawing is then only fills
+    def __init__(self):
+        self.cache = {}
+
+    def rects(self, size, radius):
+        rects = self.cache.get((size, radius))
+        if rects is None:
+            width, height = size
+            circle = pygame.Surface(size, depth=8)
+            pygame.draw.circle(circle, 1, (width // 2, height // 2), radius)
+            inside = pygame.surfarray.array2d(circle).T != 0
+
+            ## One (first, last) column span per row, None for rows the circle misses. Runs of equal rows share a rect
+            spans = []
+            for row in inside:
+                columns = np.flatnonzero(row)
+                spans.append((int(columns[0]), int(columns[-1])) if len(columns) else None)
+            rects = []
+            top = 0
+            for y in range(1, height + 1):
+                if y < height and spans[y] == spans[top]:
+                    continue
+                span = spans[top]
+                if span is None:
+                    rects.append(pygame.Rect(0, top, width, y - top))
+                else:
+                    if span[0] > 0:
+                        rects.append(pygame.Rect(0, top, span[0], y - top))
+                    if span[1] < width - 1:
+                        rects.append(pygame.Rect(span[1] + 1, top, width - span[1] - 1, y - top))
+                top = y
+            self.cache[(size, radius)] = rects
+        return rects
+
+    def render(self, surf, radius):
+        for rect in self.rects(surf.get_size(), radius):
+            surf.fill((0, 0, 0), rect)
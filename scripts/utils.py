@@ -18,23 +18,32 @@ def load_images(path):
 
 
 class Animation:
+    ## A clip shared by everything playing it and never changed after loading, players keep their own start tick
     def __init__(self, images, img_dur=5, loop=True):
         self.images = images
+        ## Mirrored frames for sprites facing left, made once here instead of on every draw
+        self.flipped_images = [pygame.transform.flip(img, True, False) for img in images]
         self.loop = loop
         self.img_duration = img_dur
-        self.done = False
-        self.frame = 0
+        self.length = img_dur * len(images)
 
-    def copy(self):
-        return Animation(self.images, self.img_duration, self.loop)
+        ## (image index, tint, flip) -> frame multiplied by tint, filled in the first time each is drawn
+        self.tinted_images = {}
 
-    def update(self):
+    def frame_at(self, elapsed):
+        ## Frame after elapsed updates: wraps when looping, otherwise holds on the last one
         if self.loop:
-            self.frame = (self.frame + 1) % (self.img_duration * len(self.images))
-        else:
-            self.frame = min(self.frame + 1, self.img_duration * len(self.images) - 1)
-            if self.frame >= self.img_duration * len(self.images) - 1:
-                self.done = True
-
-    def img(self):
-        return self.images[int(self.frame / self.img_duration)]
+            return elapsed % self.length
+        return min(elapsed, self.length - 1)
+
+    def img(self, frame=0, flip=False):
+        return (self.flipped_images if flip else self.images)[int(frame / self.img_duration)]
+
+    def tinted_img(self, frame, tint, flip=False):
+        key = (int(frame / self.img_duration), tint, flip)
+        img = self.tinted_images.get(key)
+        if img is None:
+            img = self.img(frame, flip).copy()
+            img.fill(tint, special_flags=pygame.BLEND_RGB_MULT)
+            self.tinted_images[key] = img
+        return img
@@ -0,0 +1,70 @@
+import pygame
+
+from scripts.entities import PhysicsEntity
+from scripts.spatial import CHUNK_SIZE
+from scripts.tilemap import Tilemap
+
+
+class Game:
+    def __init__(self):
+        self.assets = {'enemy/idle': None}
+        self.tick = 0
+
+
+def make_floor(width=40, y=10):
+    ## One row of grass, merged into a single rect per chunk
+    tilemap = Tilemap(Game())
+    for x in range(width):
+        tilemap.set_tile((x, y), 'grass', 1)
+    return tilemap
+
+
+def test_floor_is_merged_per_chunk():
+    tilemap = make_floor()
+    rects = tilemap.physics_rects_in(pygame.Rect(0, 160, 16, 16))
+    assert len(rects) == 1 and rects[0].width == CHUNK_SIZE * 16
+
+
+def test_land_and_walk_along_wide_floor():
+    tilemap = make_floor()
+    entity = PhysicsEntity(Game(), 'enemy', (100.3, 100.7), (8, 15))
+    for i in range(100):
+        entity.update(tilemap)
+        if entity.collisions['down']:
+            break
+    assert entity.collisions['down']
+    assert entity.pos[1] == 160 - 15
+
+    x = entity.pos[0]
+    for i in range(200):
+        entity.update(tilemap, movement=(1.3, 0))
+        x += 1.3
+        assert entity.pos[1] == 160 - 15
+        assert abs(entity.pos[0] - x) < 1e-6
+        assert not entity.collisions['left'] and not entity.collisions['right']
+    for i in range(200):
+        entity.update(tilemap, movement=(-0.7, 0))
+        x -= 0.7
+        assert entity.pos[1] == 160 - 15
+        assert abs(entity.pos[0] - x) < 1e-6
+
+
+def test_overlap_pushes_out_by_smallest_displacement():
+    ## Sunk a fraction into the floor, walking must not carry the entity to either end of the merged rect
+    tilemap = make_floor()
+    entity = PhysicsEntity(Game(), 'enemy', (300.0, 160 - 15 + 1e-9), (8, 15))
+    entity.velocity[1] = 1
+    entity.update(tilemap, movement=(1, 0))
+    assert entity.pos[0] == 301.0
+    assert entity.pos[1] == 160 - 15
+    assert entity.collisions['down']
+
+
+def test_wall_stops_fast_move_at_its_edge():
+    tilemap = make_floor()
+    for y in range(5, 10):
+        tilemap.set_tile((30, y), 'stone', 1)
+    entity = PhysicsEntity(Game(), 'enemy', (100.25, 145), (8, 15))
+    entity.move(tilemap, (400, 0))
+    assert entity.pos[0] == 30 * 16 - 8
+    assert entity.collisions['right']